@@ -0,0 +1,107 @@
+"""
+Бенчмарк пакетной генерации ответов (ANSWER_BATCH_ENABLED): всплеск различных
+вопросов пользователей с пакетами и без. Сравниваются число запросов к модели,
+время ответа и общая пропускная способность.
+
+Модель имитируется: каждый запрос занимает request_latency плюс время на
+выходные токены, одновременно выполняется не больше AI_MAX_CONCURRENCY
+запросов (как в GoogleAIService). С --fail-rate часть пакетных ответов
+приходит без разделителей, чтобы проверить переход к отдельным запросам.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_answer_batching [--questions 40] [--window 0.3] [--batch-size 8]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import re
+import statistics
+import time
+from types import SimpleNamespace
+
+from services.answer_batcher import AnswerBatcher
+from services.google_ai import GoogleAIService
+
+
+class SimulatedModel:
+    """Имитация generate_content_async, понимающая пакетный промпт"""
+
+    def __init__(self, request_latency, output_token_latency, fail_rate, rng):
+        self.request_latency = request_latency
+        self.output_token_latency = output_token_latency
+        self.fail_rate = fail_rate
+        self.rng = rng
+
+    async def generate_content_async(self, prompt):
+        # Метка пакета берется из образца разделителя в промпте
+        tag = re.search(r'===ОТВЕТ 1 (\w+)===', prompt)
+        count = len(re.findall(r'^\s*Вопрос \d+:', prompt, re.MULTILINE))
+        answer = 'Ответ специалиста с практическими рекомендациями для родителей. ' * 3
+        if tag and self.rng.random() >= self.fail_rate:
+            text = '\n'.join(f"{AnswerBatcher.marker(i, tag.group(1))}\n{answer}" for i in range(1, count + 1))
+        else:
+            text = answer
+        await asyncio.sleep(self.request_latency + len(text) // 4 * self.output_token_latency)
+        return SimpleNamespace(text=text, usage_metadata=None)
+
+
+async def run_mode(ai_service, batcher, args):
+    ai_service.usage = {'requests': 0, 'prompt_tokens': 0, 'response_tokens': 0}
+    rng = random.Random(args.seed)
+    latencies = []
+
+    async def ask(i):
+        await asyncio.sleep(rng.uniform(0, args.burst))
+        question = f"Как помочь ребенку {i} лет с режимом дня?"
+        start = time.perf_counter()
+        if batcher:
+            answer = await batcher.answer(question)
+        else:
+            answer = await ai_service.answer_question(question, None)
+        latencies.append(time.perf_counter() - start)
+        assert answer and '===' not in answer, "Ответ не разобран"
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(i) for i in range(args.questions)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{'пакеты' if batcher else 'отдельно':>8} | "
+        f"запросов к модели {ai_service.usage['requests']:3d} | "
+        f"ответ: среднее {statistics.mean(latencies):5.2f} с, p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1]:5.2f} с | "
+        f"{args.questions / elapsed:5.1f} вопросов/с"
+    )
+    if batcher:
+        print(f"{'':>8} | {batcher.stats()}")
+
+
+async def main_async(args):
+    ai_service = GoogleAIService()
+    ai_service.cache = None
+    ai_service.model = SimulatedModel(
+        args.request_latency, args.output_token_latency, args.fail_rate, random.Random(args.seed)
+    )
+
+    await run_mode(ai_service, None, args)
+    await run_mode(ai_service, AnswerBatcher(ai_service, window=args.window, max_size=args.batch_size), args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=40)
+    parser.add_argument('--burst', type=float, default=1.0, help='секунд, за которые приходят вопросы')
+    parser.add_argument('--window', type=float, default=0.3)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--request-latency', type=float, default=0.8, help='секунд на запрос (имитация)')
+    parser.add_argument('--output-token-latency', type=float, default=0.002, help='секунд на выходной токен')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='доля пакетных ответов без разделителей')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
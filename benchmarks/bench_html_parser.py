@@ -0,0 +1,145 @@
+"""
+Бенчмарк backend'ов разбора HTML: скорость разбора и извлечения полей по селекторам
+MEDICAL_SOURCES и проверка, что результаты совпадают с html.parser.
+
+Страницы берутся из каталога с сохраненными .html (--pages), из HTTP-кэша скрапера
+или, если их нет, генерируются.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_html_parser [--pages DIR] [--repeat 5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+from config.config import MEDICAL_SOURCES, HTTP_CACHE_PATH
+from services.html_parser import PARSER_BACKENDS, get_parser
+from services.scraper import Scraper
+
+ARTICLE_TEMPLATE = """
+<div class="{wrapper}">
+  <!-- запись {index} -->
+  <a class="post__img " href="/post/{index}"><img src="/img/{index}.jpg"></a>
+  <h2 class="title"><a class="post__title" href="/post/{index}">{title}</a></h2>
+  <div class="post__title">{title}</div>
+  <h4 class="title">{title}&nbsp;&mdash; подробности</h4>
+  <div class="post__description entry-content text">
+    <p>{text}</p>
+    <script>var views_{index} = {index};</script>
+    <p>{text} <b>Важно:</b> {text}</p>
+  </div>
+  <time class="date">0{day}.05.2024</time>
+</div>
+"""
+
+WORDS = ('ребенок родители развитие терапия занятия речь навыки поддержка врач '
+         'аутизм реабилитация семья специалист игра внимание общение').split()
+
+
+def make_page(rng, articles=30):
+    def sentence(length):
+        return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+    body = ''.join(
+        ARTICLE_TEMPLATE.format(
+            wrapper=rng.choice(['post', 'article-item', 'news-item', 'entry']),
+            index=index, title=sentence(8), text=sentence(25), day=rng.randint(1, 9)
+        )
+        for index in range(articles)
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Новости фонда</title>'
+        '<style>.post { color: red; }</style></head>'
+        f'<body><header><a href="/">Главная</a></header><main>{body}</main>'
+        '<footer><p>&copy; 2024 &laquo;Фонд&raquo;</p></footer></body></html>'
+    )
+
+
+def load_pages(pages_dir, rng):
+    """Пары (html, источники) для прогона"""
+    if pages_dir:
+        files = sorted(Path(pages_dir).glob('*.html'))
+        return [(path.read_text(encoding='utf-8', errors='replace'), MEDICAL_SOURCES) for path in files]
+
+    pages = []
+    if os.path.exists(HTTP_CACHE_PATH):
+        by_url = {source.url: source for source in MEDICAL_SOURCES}
+        connection = sqlite3.connect(HTTP_CACHE_PATH)
+        try:
+            for url, body in connection.execute("SELECT url, body FROM http_cache"):
+                if url in by_url:
+                    pages.append((body, [by_url[url]]))
+        except sqlite3.Error:
+            pass
+        connection.close()
+
+    return pages or [(make_page(rng), MEDICAL_SOURCES) for _ in range(10)]
+
+
+async def extract_all(scraper, parser, pages):
+    results = []
+    for html, sources in pages:
+        document = parser.parse(html)
+        for source in sources:
+            results.append(await scraper.find_content(document, source.selectors, parser))
+    return results
+
+
+async def run(pages, repeat):
+    scraper = Scraper()
+    reference = await extract_all(scraper, get_parser('html.parser'), pages)
+    total_bytes = sum(len(html.encode('utf-8')) for html, _ in pages)
+
+    for name in PARSER_BACKENDS:
+        parser = get_parser(name)
+        if parser.name != name:
+            print(f"{name:>12} | не установлен")
+            continue
+
+        parse_time = 0.0
+        extract_time = 0.0
+        for _ in range(repeat):
+            for html, sources in pages:
+                start = time.perf_counter()
+                document = parser.parse(html)
+                parse_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                for source in sources:
+                    await scraper.find_content(document, source.selectors, parser)
+                extract_time += time.perf_counter() - start
+
+        results = await extract_all(scraper, parser, pages)
+        mismatches = sum(1 for actual, expected in zip(results, reference) if actual != expected)
+        count = len(pages) * repeat
+        print(
+            f"{name:>12} | разбор {parse_time / count * 1000:7.2f} мс/стр | "
+            f"извлечение {extract_time / count * 1000:7.2f} мс/стр | "
+            f"{count / (parse_time + extract_time):7.1f} стр/с, "
+            f"{total_bytes * repeat / (parse_time + extract_time) / 1024 / 1024:6.2f} МБ/с | "
+            f"расхождений с html.parser: {mismatches} из {len(results)}"
+        )
+
+    scraper.http_cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', help='каталог с сохраненными страницами *.html')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    pages = load_pages(args.pages, random.Random(args.seed))
+    print(f"Страниц: {len(pages)}")
+    asyncio.run(run(pages, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
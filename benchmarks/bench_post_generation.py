@@ -0,0 +1,135 @@
+"""
+Бенчмарк генерации поста: двухшаговый режим (структура, затем наполнение) против
+однопроходного (POST_SINGLE_PASS). Сравниваются время генерации и объем токенов.
+
+По умолчанию модель имитируется: задержка складывается из времени на запрос и
+времени на входные и выходные токены (примерно 4 символа на токен). С --live
+используется настоящий Gemini (нужен GOOGLE_AI_API_KEY), токены берутся из
+usage_metadata ответов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_post_generation [--posts 10] [--live]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from services.article_dedup import ArticleDeduplicator
+from services.google_ai import GoogleAIService
+from services.post_generator import PostGenerator, STRUCTURE_MARKER, POST_MARKER
+
+ARTICLE = {
+    'title': 'Как помочь ребенку с аутизмом привыкнуть к новому распорядку дня',
+    'content': ('Специалисты советуют вводить изменения постепенно, использовать визуальное '
+                'расписание и заранее проговаривать с ребенком каждый новый шаг. ') * 12,
+    'source_name': 'Ya Roditel',
+    'source_url': 'https://www.ya-roditel.ru/parents/base/experts/',
+}
+
+
+def estimate_tokens(text):
+    return max(len(text) // 4, 1)
+
+
+class SimulatedModel:
+    """Имитация generate_content_async: время ответа растет с объемом входа и выхода"""
+
+    def __init__(self, request_latency, input_token_latency, output_token_latency, rng):
+        self.request_latency = request_latency
+        self.input_token_latency = input_token_latency
+        self.output_token_latency = output_token_latency
+        self.rng = rng
+
+    def _words(self, count):
+        words = 'поддержка ребенок развитие семья терапия занятия речь игра'.split()
+        return ' '.join(self.rng.choice(words) for _ in range(count))
+
+    async def generate_content_async(self, prompt):
+        structure = '\n'.join(f"{i}. {self._words(6)}" for i in range(1, 6))
+        post = self._words(110)
+        if POST_MARKER in prompt:
+            text = f"{STRUCTURE_MARKER}\n{structure}\n{POST_MARKER}\n{post}"
+        elif 'Структура:' in prompt:
+            text = post
+        else:
+            text = structure
+
+        prompt_tokens = estimate_tokens(prompt)
+        response_tokens = estimate_tokens(text)
+        await asyncio.sleep(
+            self.request_latency
+            + prompt_tokens * self.input_token_latency
+            + response_tokens * self.output_token_latency
+        )
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=response_tokens)
+        )
+
+
+class FixedArticleScraper:
+    async def scrape_by_category(self, category, language='ru'):
+        return [dict(ARTICLE)]
+
+
+async def run_mode(generator, ai_service, single_pass, posts):
+    generator.single_pass = single_pass
+    ai_service.usage = {'requests': 0, 'prompt_tokens': 0, 'response_tokens': 0}
+    latencies = []
+    for _ in range(posts):
+        start = time.perf_counter()
+        post = await generator.generate_ai_post(category='parenting', use_cache=False)
+        latencies.append(time.perf_counter() - start)
+        assert post, "Пост не сгенерирован"
+
+    usage = ai_service.usage
+    print(
+        f"{'однопроходный' if single_pass else 'двухшаговый':>14} | "
+        f"среднее {statistics.mean(latencies):6.2f} с, медиана {statistics.median(latencies):6.2f} с | "
+        f"запросов на пост {usage['requests'] / posts:4.1f} | "
+        f"токенов на пост: вход {usage['prompt_tokens'] / posts:7.0f}, выход {usage['response_tokens'] / posts:6.0f}"
+    )
+
+
+async def main_async(args):
+    ai_service = GoogleAIService()
+    ai_service.cache = None
+    if not args.live:
+        ai_service.model = SimulatedModel(
+            args.request_latency, args.input_token_latency, args.output_token_latency, random.Random(args.seed)
+        )
+
+    generator = PostGenerator(ai_service, FixedArticleScraper())
+    # Отпечатки статей в памяти: одна и та же статья используется в каждом прогоне
+    generator.deduplicator = ArticleDeduplicator(path=':memory:')
+
+    async def keep_all(articles):
+        return articles
+
+    generator.deduplicator.afilter_new = keep_all
+
+    for single_pass in (False, True):
+        random.seed(args.seed)  # одинаковая последовательность выбора стратегий в обоих режимах
+        await run_mode(generator, ai_service, single_pass, args.posts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--live', action='store_true', help='запросы к настоящему Gemini')
+    parser.add_argument('--request-latency', type=float, default=0.4, help='секунд на запрос (имитация)')
+    parser.add_argument('--input-token-latency', type=float, default=0.0002, help='секунд на входной токен')
+    parser.add_argument('--output-token-latency', type=float, default=0.004, help='секунд на выходной токен')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Бенчмарк поиска QA: полный перебор (как в старом get_qa) против инвертированного индекса
+и векторизованного top-k.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_qa_index [--sizes 1000 10000 100000] [--queries 20]
+"""
+import argparse
+import itertools
+import logging
+import random
+import time
+
+from database.db_manager import DBManager
+from database.qa_index import QAIndex, word_similarity
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+
+
+def make_vocabulary(size, rng):
+    words = [
+        ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 10)))
+        for _ in range(size)
+    ]
+    return words, list(itertools.accumulate(1 / rank for rank in range(1, size + 1)))
+
+
+def make_question(vocabulary, rng):
+    # Закон Ципфа: вес слова обратно пропорционален его рангу
+    words = rng.choices(vocabulary[0], cum_weights=vocabulary[1], k=rng.randint(4, 12))
+    return ' '.join(words).capitalize() + '?'
+
+
+def linear_best_match(rows, question, similarity_threshold=70):
+    """Полный перебор со старой логикой get_qa: нормализация каждой строки на каждый запрос"""
+    best_id = None
+    best_similarity = 0
+    words1 = DBManager.normalize_text(question).split()
+    for qa_id, db_question in rows:
+        words2 = DBManager.normalize_text(db_question).split()
+        similarity = word_similarity(words1, words2)
+        if similarity > best_similarity and similarity >= similarity_threshold:
+            best_id = qa_id
+            best_similarity = similarity
+    return best_id, best_similarity
+
+
+def run(size, queries, rng):
+    vocabulary = make_vocabulary(max(size // 2, 500), rng)
+    rows = [(qa_id, make_question(vocabulary, rng)) for qa_id in range(1, size + 1)]
+
+    start = time.perf_counter()
+    index = QAIndex()
+    for qa_id, question in rows:
+        index.add(qa_id, DBManager.normalize_text(question))
+    build_time = time.perf_counter() - start
+
+    # Половина запросов - перефразы существующих вопросов, половина - новые
+    probes = []
+    for i in range(queries):
+        if i % 2:
+            words = rng.choice(rows)[1].split()
+            rng.shuffle(words)
+            probes.append(' '.join(words[:-1] or words))
+        else:
+            probes.append(make_question(vocabulary, rng))
+
+    linear_total = 0.0
+    index_total = 0.0
+    topk_total = 0.0
+    index.top_k(probes[0])  # построение матрицы слов
+    for probe in probes:
+        start = time.perf_counter()
+        expected = linear_best_match(rows, probe)
+        linear_total += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = index.best_match(DBManager.normalize_text(probe))
+        index_total += time.perf_counter() - start
+
+        assert actual == expected, f"Результаты различаются для '{probe}': {actual} != {expected}"
+
+        start = time.perf_counter()
+        ranked = index.top_k(DBManager.normalize_text(probe), k=5)
+        topk_total += time.perf_counter() - start
+
+        assert (ranked[0] if ranked else (None, 0)) == expected, f"top-k расходится для '{probe}'"
+
+    print(
+        f"{size:>7} строк | построение индекса {build_time:7.2f} с | "
+        f"перебор {linear_total / queries * 1000:9.2f} мс/запрос | "
+        f"индекс {index_total / queries * 1000:8.3f} мс/запрос | "
+        f"top-5 {topk_total / queries * 1000:8.3f} мс/запрос | "
+        f"ускорение x{linear_total / max(index_total, 1e-9):.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        run(size, args.queries, rng)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Задержка от обновления до ответа: webhook (BOT_MODE=webhook) против long polling.
+
+Поднимается локальный фальшивый Bot API (aiohttp): он отвечает на getMe,
+sendMessage и прочие методы, а в режиме polling отдает очередь обновлений
+через getUpdates. Бот - настоящий Application из python-telegram-bot с
+обработчиком, который отвечает на каждое сообщение. Время считается от
+отправки обновления (POST на webhook или появления в getUpdates) до вызова
+sendMessage с ответом. Дополнительно проверяется, что запросы с неверным
+секретом отклоняются.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_webhook [--updates 200] [--rate 50]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application, ContextTypes, MessageHandler, filters
+
+from services.webhook_server import WebhookServer, SECRET_HEADER
+
+TOKEN = '123456:FAKE'
+SECRET = 'bench-secret'
+
+
+class FakeTelegram:
+    """Фальшивый Bot API: фиксирует время ответов бота"""
+
+    def __init__(self, api_latency):
+        self.api_latency = api_latency
+        self.sent_at = {}
+        self.replied = {}
+        self.pending_updates = asyncio.Queue()
+        self.update_id = 0
+        self._next_message_id = 1
+
+    def make_update(self, text):
+        self.update_id += 1
+        return {
+            'update_id': self.update_id,
+            'message': {
+                'message_id': self.update_id,
+                'date': int(time.time()),
+                'chat': {'id': 1000 + self.update_id % 50, 'type': 'private'},
+                'from': {'id': 1000 + self.update_id % 50, 'is_bot': False, 'first_name': 'User'},
+                'text': text,
+            },
+        }
+
+    @staticmethod
+    async def _params(request):
+        if request.content_type == 'application/json':
+            return await request.json()
+        params = {}
+        for key, value in (await request.post()).items():
+            try:
+                params[key] = json.loads(value)
+            except (TypeError, ValueError):
+                params[key] = value
+        return params
+
+    async def handle(self, request):
+        method = request.match_info['method']
+        params = await self._params(request)
+        await asyncio.sleep(self.api_latency)
+
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+        elif method == 'getUpdates':
+            result = await self._get_updates(params)
+        elif method == 'sendMessage':
+            reply_to = int(str(params['text']).split()[-1])
+            self.replied[reply_to] = time.perf_counter()
+            self._next_message_id += 1
+            result = {
+                'message_id': self._next_message_id,
+                'date': int(time.time()),
+                'chat': {'id': int(params['chat_id']), 'type': 'private'},
+                'text': params['text'],
+            }
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _get_updates(self, params):
+        # Long polling: ждем первое обновление не дольше timeout
+        offset = int(params.get('offset') or 0)
+        try:
+            first = await asyncio.wait_for(self.pending_updates.get(), float(params.get('timeout') or 0) or 0.01)
+        except asyncio.TimeoutError:
+            return []
+        updates = [first]
+        while not self.pending_updates.empty():
+            updates.append(self.pending_updates.get_nowait())
+        return [update for update in updates if update['update_id'] >= offset]
+
+
+async def reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(f"Ответ на {update.message.message_id}")
+
+
+async def run_mode(mode, args, api_url, telegram):
+    application = (
+        Application.builder().token(TOKEN).base_url(f"{api_url}/bot").concurrent_updates(True).build()
+    )
+    application.add_handler(MessageHandler(filters.TEXT, reply))
+    await application.initialize()
+    await application.start()
+
+    server = None
+    if mode == 'webhook':
+        server = WebhookServer(application, host='127.0.0.1', port=args.webhook_port,
+                               path='/telegram', secret_token=SECRET, url=None)
+        await server.start()
+    else:
+        await application.updater.start_polling(poll_interval=0, timeout=10)
+
+    webhook_url = f"http://127.0.0.1:{args.webhook_port}/telegram"
+    async with aiohttp.ClientSession() as session:
+        if server:
+            async with session.post(webhook_url, json=telegram.make_update('x'),
+                                    headers={SECRET_HEADER: 'wrong'}) as response:
+                assert response.status == 403, f"Неверный секрет принят: {response.status}"
+
+        sent = []
+        for _ in range(args.updates):
+            update = telegram.make_update('Вопрос')
+            telegram.sent_at[update['update_id']] = time.perf_counter()
+            sent.append(update['update_id'])
+            if server:
+                async with session.post(webhook_url, json=update, headers={SECRET_HEADER: SECRET}) as response:
+                    assert response.status == 200
+            else:
+                telegram.pending_updates.put_nowait(update)
+            await asyncio.sleep(1 / args.rate)
+
+        deadline = time.perf_counter() + 30
+        while not all(update_id in telegram.replied for update_id in sent) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+    if server:
+        await server.stop()
+    else:
+        await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+
+    latencies = sorted(
+        (telegram.replied[update_id] - telegram.sent_at[update_id]) * 1000
+        for update_id in sent if update_id in telegram.replied
+    )
+    print(
+        f"{mode:>8} | ответов {len(latencies)}/{len(sent)} | "
+        f"задержка: медиана {statistics.median(latencies):6.1f} мс, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:6.1f} мс, макс {latencies[-1]:6.1f} мс"
+        + (f" | отклонено {server.rejected}" if server else "")
+    )
+
+
+async def main_async(args):
+    telegram = FakeTelegram(args.api_latency)
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', telegram.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', args.api_port).start()
+    try:
+        for mode in ('polling', 'webhook'):
+            await run_mode(mode, args, f"http://127.0.0.1:{args.api_port}", telegram)
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=50, help='обновлений в секунду')
+    parser.add_argument('--api-latency', type=float, default=0.02, help='секунд на вызов Bot API')
+    parser.add_argument('--api-port', type=int, default=8081)
+    parser.add_argument('--webhook-port', type=int, default=8082)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,19 +9,92 @@ load_dotenv()
 # Telegram Configuration
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 ADMIN_IDS = list(map(int, os.getenv('ADMIN_IDS', '').split(',')))
+# Получение обновлений: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')  # символы A-Z, a-z, 0-9, _ и -
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')  # публичный адрес; без него webhook не регистрируется
+# Фоновые задачи процесса: сбор статей по расписанию, обход сайтов и пул черновиков.
+# При нескольких процессах за балансировщиком включайте их только в одном,
+# иначе каждый процесс будет собирать статьи и генерировать черновики сам
+BACKGROUND_TASKS_ENABLED = os.getenv('BACKGROUND_TASKS_ENABLED', 'true').lower() == 'true'
+# Постепенный вывод ответов ИИ правками сообщения
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'true').lower() == 'true'
+STREAM_EDIT_INTERVAL = float(os.getenv('STREAM_EDIT_INTERVAL', '1.5'))  # секунд между правками
+# Ограничение частоты вопросов: на пользователя и общее (0 - без общего лимита).
+# Всплеск до MAX_REQUESTS, затем по одному каждые WINDOW / MAX_REQUESTS секунд
+RATE_LIMIT_MAX_REQUESTS = int(os.getenv('RATE_LIMIT_MAX_REQUESTS', '10'))
+RATE_LIMIT_WINDOW = float(os.getenv('RATE_LIMIT_WINDOW', '60'))  # секунд
+RATE_LIMIT_GLOBAL_MAX_REQUESTS = int(os.getenv('RATE_LIMIT_GLOBAL_MAX_REQUESTS', '0'))
+RATE_LIMIT_GLOBAL_WINDOW = float(os.getenv('RATE_LIMIT_GLOBAL_WINDOW', '60'))
+# sqlite-файл общего состояния для нескольких процессов бота; пусто - в памяти процесса
+RATE_LIMIT_SHARED_PATH = os.getenv('RATE_LIMIT_SHARED_PATH', '')
 
 
 # Google AI Configuration
 GOOGLE_AI_API_KEY = os.getenv('GOOGLE_AI_API_KEY')
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '4'))
+AI_REQUEST_TIMEOUT = float(os.getenv('AI_REQUEST_TIMEOUT', '60'))
+# Объединение одновременных вопросов пользователей в один запрос к модели
+ANSWER_BATCH_ENABLED = os.getenv('ANSWER_BATCH_ENABLED', 'false').lower() == 'true'
+ANSWER_BATCH_WINDOW = float(os.getenv('ANSWER_BATCH_WINDOW', '0.3'))  # секунд ожидания остальных вопросов
+ANSWER_BATCH_MAX_SIZE = int(os.getenv('ANSWER_BATCH_MAX_SIZE', '8'))  # вопросов в одном запросе
+
+# LLM Response Cache Configuration
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.db')
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+# TTL в секундах для каждого места вызова (0 - не кэшировать)
+LLM_CACHE_TTLS = {
+    'answer': int(os.getenv('LLM_CACHE_TTL_ANSWER', str(7 * 24 * 3600))),
+    'post_structure': int(os.getenv('LLM_CACHE_TTL_POST_STRUCTURE', '3600')),
+    'post_content': int(os.getenv('LLM_CACHE_TTL_POST_CONTENT', '3600')),
+    'post_single_pass': int(os.getenv('LLM_CACHE_TTL_POST_SINGLE_PASS', '3600')),
+}
+
+# Post Generation Configuration
+# Структура и текст поста одним запросом к модели вместо двух последовательных
+POST_SINGLE_PASS = os.getenv('POST_SINGLE_PASS', 'false').lower() == 'true'
+
+# Post Draft Pool Configuration
+DRAFT_POOL_SIZE = int(os.getenv('DRAFT_POOL_SIZE', '3'))  # черновиков на категорию, 0 - без пула
+DRAFT_POOL_CONCURRENCY = int(os.getenv('DRAFT_POOL_CONCURRENCY', '1'))
+DRAFT_POOL_MAX_AGE = int(os.getenv('DRAFT_POOL_MAX_AGE', str(12 * 3600)))
 
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
 
 # Scraping Configuration
 SCRAPING_INTERVAL = int(os.getenv('SCRAPING_INTERVAL', '3600'))
+SCRAPING_JITTER = float(os.getenv('SCRAPING_JITTER', '0.1'))  # доля интервала
+SCRAPING_STAGGER = float(os.getenv('SCRAPING_STAGGER', '5'))  # секунд между источниками
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
 REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
 CONCURRENT_REQUESTS = int(os.getenv('CONCURRENT_REQUESTS', '3'))
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', 'http_cache.db')
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '300'))
+HTML_PARSER = os.getenv('HTML_PARSER', 'html.parser')  # html.parser, lxml или selectolax
+LEARNED_SELECTORS_PATH = os.getenv('LEARNED_SELECTORS_PATH', 'learned_selectors.json')
+SCRAPE_STREAMING = os.getenv('SCRAPE_STREAMING', 'true').lower() == 'true'
+SCRAPE_MAX_BYTES = int(os.getenv('SCRAPE_MAX_BYTES', str(2 * 1024 * 1024)))
+CRAWL_ENABLED = os.getenv('CRAWL_ENABLED', 'true').lower() == 'true'
+CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', '100'))  # на источник за одно обновление
+CRAWL_MAX_DEPTH = int(os.getenv('CRAWL_MAX_DEPTH', '5'))
+CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', '8'))  # на все источники
+CRAWL_HOST_DELAY = float(os.getenv('CRAWL_HOST_DELAY', '1.0'))  # секунд между запросами к хосту
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '3'))  # ошибок подряд до отключения хоста
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', '60'))  # секунд, удваивается при повторных сбоях
+BREAKER_MAX_COOLDOWN = float(os.getenv('BREAKER_MAX_COOLDOWN', '1800'))
+
+# Cache Configuration
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.8'))
+SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '5000'))
+ARTICLE_FINGERPRINTS_PATH = os.getenv('ARTICLE_FINGERPRINTS_PATH', 'article_fingerprints.db')
+ARTICLE_DEDUP_THRESHOLD = float(os.getenv('ARTICLE_DEDUP_THRESHOLD', '0.8'))
 
 def create_lenient_ssl_context():
     context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
@@ -42,6 +115,7 @@ class MedicalSource:
     pagination: Optional[Dict[str, str]] = None
     ssl_context: Optional[ssl.SSLContext] = None
     verify_ssl: bool = True  
+    parser: Optional[str] = None  # backend разбора HTML, по умолчанию HTML_PARSER
 
 # Существующие источники остаются без изменений
 MEDICAL_SOURCES = [
@@ -0,0 +1,307 @@
+from sqlalchemy import event, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from config.config import DATABASE_URL, DB_POOL_SIZE
+from database.db_manager import Base, DBManager, QA, Article
+from datetime import datetime
+import json
+from database.qa_index import QAIndex
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Асинхронные драйверы для синхронных URL из DATABASE_URL
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def make_async_url(database_url):
+    """
+    Преобразование DATABASE_URL в URL с асинхронным драйвером
+    (sqlite:///DB.db -> sqlite+aiosqlite:///DB.db)
+    """
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+class AsyncDBManager:
+    """
+    Асинхронный вариант DBManager для обработчиков Telegram.
+    
+    Пул соединений на движке и отдельная сессия на каждый запрос:
+    запросы разных пользователей не блокируют цикл событий и друг друга.
+    Поиск и нормализация - те же, что в DBManager.
+    """
+
+    def __init__(self, database_url=DATABASE_URL, pool_size=DB_POOL_SIZE):
+        url = make_async_url(database_url)
+        engine_options = {}
+        if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+            engine_options.update(pool_size=pool_size, max_overflow=pool_size, pool_pre_ping=True)
+        
+        self.engine = create_async_engine(url, **engine_options)
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.qa_index = None
+        self._index_lock = asyncio.Lock()
+        self._schema_ready = False
+        self._schema_lock = asyncio.Lock()
+        
+        if url.get_backend_name() == 'sqlite':
+            # WAL: чтение не ждет завершения записи в соседнем соединении
+            @event.listens_for(self.engine.sync_engine, 'connect')
+            def _set_sqlite_pragma(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA busy_timeout=5000')
+                cursor.close()
+
+    async def init(self):
+        """
+        Создание таблиц и миграция схемы (один раз)
+        """
+        if self._schema_ready:
+            return
+        async with self._schema_lock:
+            if self._schema_ready:
+                return
+            async with self.engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+                await connection.run_sync(DBManager.migrate_qa_table)
+            self._schema_ready = True
+
+    async def _get_qa_index(self, session):
+        """
+        Ленивое построение инвертированного индекса вопросов
+        """
+        if self.qa_index is None:
+            async with self._index_lock:
+                if self.qa_index is None:
+                    qa_index = QAIndex()
+                    result = await session.execute(select(QA.id, QA.normalized_question))
+                    for qa_id, normalized in result:
+                        qa_index.add(qa_id, normalized or '')
+                    self.qa_index = qa_index
+                    logger.debug(f"QA index built: {len(qa_index)} questions")
+        return self.qa_index
+
+    async def get_qa(self, question, similarity_threshold=70):
+        """
+        Поиск вопроса с высокой степенью совпадения
+        
+        :param question: Входящий вопрос
+        :param similarity_threshold: Порог схожести (по умолчанию 70%)
+        """
+        await self.init()
+        norm_input = DBManager.normalize_text(question)
+        logger.debug(f"Searching QA for question: {norm_input}")
+        
+        async with self.Session() as session:
+            # Точный повтор вопроса - поиск по уникальному индексу
+            if norm_input:
+                result = await session.execute(
+                    select(QA).where(QA.normalized_question == norm_input).limit(1)
+                )
+                exact_match = result.scalar_one_or_none()
+                if exact_match:
+                    logger.info(f"Exact match found: {exact_match.question}")
+                    return exact_match
+            
+            qa_index = await self._get_qa_index(session)
+            best_id, best_similarity = qa_index.best_match(norm_input, similarity_threshold)
+            if best_id is not None:
+                best_match = await session.get(QA, best_id)
+                if best_match:
+                    logger.info(f"Best match found: {best_match.question}")
+                    logger.info(f"Similarity: {best_similarity}%")
+                    return best_match
+        
+        logger.warning("No matching QA pair found")
+        return None
+
+    async def get_qa_topk(self, question, k=5, threshold=70):
+        """
+        Ранжированный список похожих вопросов: пары (QA, схожесть)
+        """
+        await self.init()
+        async with self.Session() as session:
+            qa_index = await self._get_qa_index(session)
+            ranked = qa_index.top_k(DBManager.normalize_text(question), k, threshold)
+            if not ranked:
+                return []
+            
+            result = await session.execute(select(QA).where(QA.id.in_([qa_id for qa_id, _ in ranked])))
+            qa_by_id = {qa.id: qa for qa in result.scalars()}
+        return [(qa_by_id[qa_id], similarity) for qa_id, similarity in ranked if qa_id in qa_by_id]
+
+    async def get_recent_qa(self, limit=1000):
+        """
+        Последние сохраненные пары (вопрос, ответ) - для прогрева кэшей
+        """
+        await self.init()
+        async with self.Session() as session:
+            result = await session.execute(
+                select(QA.question, QA.answer).order_by(QA.id.desc()).limit(limit)
+            )
+            return [(question, answer) for question, answer in result]
+
+    async def add_qa(self, question, answer):
+        """
+        Добавление или обновление пары вопрос-ответ (upsert по нормализованному вопросу)
+        """
+        await self.init()
+        normalized = DBManager.normalize_text(question)
+        values = {'question': question, 'normalized_question': normalized, 'answer': answer}
+        
+        try:
+            async with self.Session() as session:
+                async with session.begin():
+                    statement = DBManager.qa_upsert_statement(self.engine.dialect.name, values)
+                    if statement is not None:
+                        await session.execute(statement)
+                    else:
+                        result = await session.execute(
+                            select(QA).where(QA.normalized_question == normalized).limit(1)
+                        )
+                        existing_qa = result.scalar_one_or_none()
+                        if existing_qa:
+                            existing_qa.answer = answer
+                        else:
+                            session.add(QA(**values))
+                
+                # Обновляем индекс, если он уже построен
+                async with self._index_lock:
+                    if self.qa_index is not None:
+                        result = await session.execute(
+                            select(QA.id).where(QA.normalized_question == normalized)
+                        )
+                        self.qa_index.add(result.scalar_one(), normalized)
+            
+            logger.info(f"Successfully added/updated QA pair: {question}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error adding QA pair: {e}")
+            return False
+
+    async def add_articles(self, articles):
+        """
+        Пакетное сохранение статей из скрапера
+        
+        Уже сохраненные статьи (тот же хэш текста и категория) пропускаются.
+        
+        :param articles: Словари из Scraper.scrape_medical_source
+        :return: Количество новых строк
+        """
+        await self.init()
+        rows = []
+        for article in articles:
+            categories = article.get('category') or []
+            if isinstance(categories, str):
+                categories = [categories]
+            timestamp = article.get('timestamp')
+            for category in categories:
+                rows.append({
+                    'title': article.get('title'),
+                    'content': article.get('content'),
+                    'keywords': json.dumps(article.get('keywords') or [], ensure_ascii=False),
+                    'source_name': article.get('source_name'),
+                    'source_url': article.get('source_url'),
+                    'category': category,
+                    'language': article.get('language'),
+                    'timestamp': datetime.fromisoformat(timestamp) if timestamp else datetime.utcnow(),
+                    'content_hash': DBManager.article_content_hash(article),
+                })
+        if not rows:
+            return 0
+        
+        dialect = self.engine.dialect.name
+        async with self.Session() as session:
+            async with session.begin():
+                if dialect in ('sqlite', 'postgresql'):
+                    insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+                    inserted = 0
+                    # Многострочный INSERT частями: лимит параметров запроса в sqlite
+                    for start in range(0, len(rows), 500):
+                        result = await session.execute(
+                            insert(Article).values(rows[start:start + 500]).on_conflict_do_nothing()
+                        )
+                        inserted += result.rowcount
+                else:
+                    existing = await session.execute(
+                        select(Article.content_hash, Article.category)
+                        .where(Article.content_hash.in_({row['content_hash'] for row in rows}))
+                    )
+                    seen = set(existing.all())
+                    new_rows = [row for row in rows if (row['content_hash'], row['category']) not in seen]
+                    session.add_all(Article(**row) for row in new_rows)
+                    inserted = len(new_rows)
+        
+        logger.info(f"Saved {inserted} new article rows")
+        return inserted
+
+    async def get_fresh_articles(self, category, language='ru', limit=10):
+        """
+        Самые свежие неиспользованные статьи категории
+        
+        :return: Список словарей в формате скрапера (с content_hash)
+        """
+        await self.init()
+        async with self.Session() as session:
+            result = await session.execute(
+                select(Article)
+                .where(
+                    Article.category == category,
+                    Article.language == language,
+                    Article.used_at.is_(None)
+                )
+                .order_by(Article.timestamp.desc())
+                .limit(limit)
+            )
+            return [
+                {
+                    'title': article.title,
+                    'content': article.content,
+                    'keywords': json.loads(article.keywords or '[]'),
+                    'source_name': article.source_name,
+                    'source_url': article.source_url,
+                    'category': [article.category],
+                    'language': article.language,
+                    'timestamp': article.timestamp.isoformat(),
+                    'content_hash': article.content_hash,
+                }
+                for article in result.scalars()
+            ]
+
+    async def mark_article_used(self, article):
+        """
+        Пометка статьи использованной во всех её категориях
+        """
+        await self.mark_articles_used([article])
+
+    async def mark_articles_used(self, articles):
+        """
+        Пометка нескольких статей использованными одним запросом
+        """
+        hashes = {article.get('content_hash') or DBManager.article_content_hash(article) for article in articles}
+        if not hashes:
+            return
+        await self.init()
+        async with self.Session() as session:
+            async with session.begin():
+                await session.execute(
+                    update(Article)
+                    .where(Article.content_hash.in_(hashes), Article.used_at.is_(None))
+                    .values(used_at=datetime.utcnow())
+                )
+
+    async def close(self):
+        """
+        Закрытие пула соединений
+        """
+        await self.engine.dispose()
+        logger.info("Database connection pool closed.")
@@ -1,9 +1,13 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import create_engine, inspect, select, update, delete, Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from config.config import DATABASE_URL
+from database.qa_index import QAIndex, word_similarity
 import sqlite3
+import hashlib
 import re
 import logging
 import sys
@@ -35,16 +39,112 @@ class QA(Base):
     
     id = Column(Integer, primary_key=True)
     question = Column(Text)
+    normalized_question = Column(Text, unique=True, index=True)
     answer = Column(Text)
 
+class Article(Base):
+    __tablename__ = 'articles'
+    __table_args__ = (
+        Index('ix_articles_category_language_timestamp', 'category', 'language', 'timestamp'),
+        # Статья источника с несколькими категориями хранится по строке на категорию
+        UniqueConstraint('content_hash', 'category', name='uq_articles_content_hash_category'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    title = Column(Text)
+    content = Column(Text)
+    keywords = Column(Text)  # JSON-список
+    source_name = Column(String(200))
+    source_url = Column(String(500))
+    category = Column(String(100), nullable=False)
+    language = Column(String(10))
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    content_hash = Column(String(64), nullable=False, index=True)
+    used_at = Column(DateTime)
+
 class DBManager:
     def __init__(self):
         self.engine = create_engine(DATABASE_URL)
         Base.metadata.create_all(self.engine)
+        self.migrate_normalized_questions()
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
+        self.qa_index = None
+
+    def migrate_normalized_questions(self):
+        """
+        Миграция старых баз: добавляет колонку normalized_question,
+        заполняет её и схлопывает дубликаты по нормализованному вопросу.
+        
+        Дубликаты объединяются в самую раннюю запись с самым свежим ответом.
+        Повторный запуск ничего не меняет.
+        
+        :return: Количество обновленных и удаленных записей
+        """
+        with self.engine.begin() as connection:
+            return self.migrate_qa_table(connection)
+
+    @staticmethod
+    def migrate_qa_table(connection):
+        """
+        Миграция таблицы qa в рамках открытого соединения
+        (используется также асинхронным менеджером через run_sync)
+        """
+        columns = {column['name'] for column in inspect(connection).get_columns('qa')}
+        changed = 0
+        
+        if 'normalized_question' not in columns:
+            logger.info("Adding normalized_question column to qa table")
+            connection.exec_driver_sql("ALTER TABLE qa ADD COLUMN normalized_question TEXT")
+        
+        pending = connection.execute(
+            select(QA.id).where(QA.normalized_question.is_(None)).limit(1)
+        ).first()
+        
+        if pending:
+            rows = connection.execute(
+                select(QA.id, QA.question, QA.answer, QA.normalized_question).order_by(QA.id)
+            ).fetchall()
+            
+            groups = {}
+            for row in rows:
+                normalized = row.normalized_question
+                if normalized is None:
+                    normalized = DBManager.normalize_text(row.question)
+                groups.setdefault(normalized, []).append(row)
+            
+            for normalized, group in groups.items():
+                keeper, latest = group[0], group[-1]
+                duplicate_ids = [row.id for row in group[1:]]
+                if duplicate_ids:
+                    connection.execute(delete(QA).where(QA.id.in_(duplicate_ids)))
+                    logger.info(f"Merged {len(duplicate_ids)} duplicate QA rows into ID {keeper.id}")
+                if keeper.normalized_question != normalized or duplicate_ids:
+                    connection.execute(
+                        update(QA)
+                        .where(QA.id == keeper.id)
+                        .values(normalized_question=normalized, answer=latest.answer)
+                    )
+                changed += len(group) if keeper.normalized_question != normalized else len(duplicate_ids)
+        
+        connection.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_qa_normalized_question ON qa (normalized_question)"
+        )
+        
+        if changed:
+            logger.info(f"Backfilled normalized_question: {changed} QA rows changed")
+        return changed
+
+    @staticmethod
+    def article_content_hash(article):
+        """
+        Хэш заголовка и текста статьи (словаря из скрапера)
+        """
+        text = f"{article.get('title') or ''}\n{article.get('content') or ''}"
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
-    def normalize_text(self, text):
+    @staticmethod
+    def normalize_text(text):
         """
         Нормализация текста для более точного сравнения
         """
@@ -99,60 +199,50 @@ class DBManager:
             return 0
         
         # Подсчет общих слов с учетом частичных совпадений
-        common_words = 0
-        for word1 in words1:
-            for word2 in words2:
-                # Проверяем, содержит ли одно слово другое (более мягкое сравнение)
-                if word1 in word2 or word2 in word1:
-                    common_words += 1
-                    break
-        
-        # Процент совпадения
-        max_words_length = max(len(words1), len(words2))
-        similarity = (common_words / max_words_length) * 100
-        
-        logger.debug(f"Common words: {common_words}")
-        logger.debug(f"Total words: {max_words_length}")
+        similarity = word_similarity(words1, words2)
+        
+        logger.debug(f"Total words: {max(len(words1), len(words2))}")
         logger.debug(f"Similarity: {similarity}%")
         
         return similarity
     
+    def _get_qa_index(self):
+        """
+        Ленивое построение инвертированного индекса вопросов
+        """
+        if self.qa_index is None:
+            self.qa_index = QAIndex()
+            for qa_id, question in self.session.query(QA.id, QA.question):
+                self.qa_index.add(qa_id, self.normalize_text(question))
+            logger.debug(f"QA index built: {len(self.qa_index)} questions")
+        return self.qa_index
+
     def get_qa(self, question, similarity_threshold=70):
         """
         Поиск вопроса с высокой степенью совпадения
         
+        Оцениваются только вопросы из инвертированного индекса,
+        у которых есть общие (или частично совпадающие) слова.
+        
         :param question: Входящий вопрос
-        :param similarity_threshold: Порог схожести (по умолчанию 75%)
+        :param similarity_threshold: Порог схожести (по умолчанию 70%)
         """
         logger.debug(f"Searching QA for question: {question}")
         
-        # Получаем все существующие вопросы
-        all_qa_pairs = self.session.query(QA).all()
+        qa_index = self._get_qa_index()
+        logger.debug(f"Total QA pairs in index: {len(qa_index)}")
         
-        logger.debug(f"Total QA pairs in database: {len(all_qa_pairs)}")
+        norm_input = self.normalize_text(question)
+        logger.debug(f"  Input (normalized): {norm_input}")
         
-        best_match = None
-        best_similarity = 0
+        # Точный повтор вопроса - поиск по уникальному индексу
+        exact_match = norm_input and self.session.query(QA).filter(QA.normalized_question == norm_input).first()
+        if exact_match:
+            logger.info(f"Exact match found: {exact_match.question}")
+            return exact_match
         
-        # Подробный лог проверки каждой пары
-        for qa_pair in all_qa_pairs:
-            norm_input = self.normalize_text(question)
-            norm_db = self.normalize_text(qa_pair.question)
-            
-            similarity = self.calculate_similarity(question, qa_pair.question)
-            
-            logger.debug(f"Checking pair:")
-            logger.debug(f"  Input (normalized): {norm_input}")
-            logger.debug(f"  DB Question (normalized): {norm_db}")
-            logger.debug(f"  Similarity: {similarity}%")
-            
-            # Более подробное сравнение
-            logger.debug(f"  Full input question: {question}")
-            logger.debug(f"  Full DB question: {qa_pair.question}")
-            
-            if similarity > best_similarity and similarity >= similarity_threshold:
-                best_match = qa_pair
-                best_similarity = similarity
+        best_id, best_similarity = qa_index.best_match(norm_input, similarity_threshold)
+        best_match = self.session.get(QA, best_id) if best_id is not None else None
         
         if best_match:
             logger.info(f"Best match found: {best_match.question}")
@@ -162,6 +252,25 @@ class DBManager:
         
         logger.warning("No matching QA pair found")
         return None
+    def get_qa_topk(self, question, k=5, threshold=70):
+        """
+        Ранжированный список похожих вопросов
+        
+        :param question: Входящий вопрос
+        :param k: Максимальное количество результатов
+        :param threshold: Порог схожести в процентах
+        :return: Список пар (QA, схожесть) по убыванию схожести
+        """
+        ranked = self._get_qa_index().top_k(self.normalize_text(question), k, threshold)
+        if not ranked:
+            return []
+        
+        qa_by_id = {
+            qa.id: qa
+            for qa in self.session.query(QA).filter(QA.id.in_([qa_id for qa_id, _ in ranked]))
+        }
+        return [(qa_by_id[qa_id], similarity) for qa_id, similarity in ranked if qa_id in qa_by_id]
+
     def manual_similarity_check(self, question):
         """
         Ручная проверка совпадения вопросов
@@ -178,24 +287,52 @@ class DBManager:
             print(f"Normalized Input:  {self.normalize_text(question)}")
             print(f"Normalized DB Q:   {self.normalize_text(qa_pair.question)}")
 
+    @staticmethod
+    def qa_upsert_statement(dialect, values):
+        """
+        INSERT ... ON CONFLICT DO UPDATE по normalized_question
+        
+        :return: Выражение для sqlite/postgresql, None для прочих СУБД
+        """
+        if dialect not in ('sqlite', 'postgresql'):
+            return None
+        
+        insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        statement = insert(QA).values(**values)
+        return statement.on_conflict_do_update(
+            index_elements=[QA.normalized_question],
+            set_={'answer': statement.excluded.answer}
+        )
+
     def add_qa(self, question, answer):
         """
         Добавление новой пары вопрос-ответ в базу данных
+        
+        Один upsert по нормализованному вопросу: повтор того же вопроса
+        (с точностью до регистра и пунктуации) обновляет ответ.
         """
         try:
-            # Проверяем, существует ли уже такой вопрос
-            existing_qa = self.session.query(QA).filter(QA.question == question).first()
+            normalized = self.normalize_text(question)
+            values = {'question': question, 'normalized_question': normalized, 'answer': answer}
+            statement = self.qa_upsert_statement(self.engine.dialect.name, values)
             
-            if existing_qa:
-                logger.info(f"QA pair already exists. Updating the existing record.")
-                existing_qa.answer = answer
+            if statement is not None:
+                self.session.execute(statement)
             else:
-                # Создаем новую запись, если вопрос не существует
-                new_qa = QA(question=question, answer=answer)
-                self.session.add(new_qa)
+                # Прочие СУБД: поиск по индексу и обновление
+                existing_qa = self.session.query(QA).filter(QA.normalized_question == normalized).first()
+                if existing_qa:
+                    existing_qa.answer = answer
+                else:
+                    self.session.add(QA(**values))
             
             # Фиксируем изменения в базе данных
             self.session.commit()
+            
+            # Обновляем индекс, если он уже построен
+            if self.qa_index is not None:
+                qa_id = self.session.query(QA.id).filter(QA.normalized_question == normalized).scalar()
+                self.qa_index.add(qa_id, normalized)
             logger.info(f"Successfully added/updated QA pair: {question}")
             return True
         
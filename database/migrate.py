@@ -0,0 +1,18 @@
+"""
+Миграция существующей базы (например, старого DB.db) под текущую схему.
+
+Запуск из корня проекта:
+    python -m database.migrate
+"""
+from database.db_manager import DBManager
+
+
+def main():
+    # DBManager применяет миграции при создании, подробности - в логе
+    db = DBManager()
+    db.close_connection()
+    print("Миграция завершена, база в актуальном состоянии")
+
+
+if __name__ == '__main__':
+    main()
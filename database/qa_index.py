@@ -0,0 +1,300 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy top-k считается через инвертированный индекс
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+def word_similarity(words1: List[str], words2: List[str]) -> float:
+    """
+    Процент совпадения слов между двумя списками нормализованных слов.
+
+    Слово считается общим, если одно слово содержит другое (частичное совпадение).
+    Та же формула, что и в DBManager.calculate_similarity.
+    """
+    if not words1 or not words2:
+        return 0
+
+    common_words = 0
+    for word1 in words1:
+        for word2 in words2:
+            if word1 in word2 or word2 in word1:
+                common_words += 1
+                break
+
+    max_words_length = max(len(words1), len(words2))
+    return (common_words / max_words_length) * 100
+
+
+def _substrings(word: str) -> Set[str]:
+    """Все непустые подстроки слова"""
+    length = len(word)
+    return {word[i:j] for i in range(length) for j in range(i + 1, length + 1)}
+
+
+class TokenMatrix:
+    """
+    Корпус вопросов в виде матрицы id слов (строка - вопрос, -1 - пустая ячейка).
+
+    Позволяет за один векторизованный проход посчитать для всех вопросов
+    число общих слов с запросом. Новые вопросы дописываются в конец
+    с удвоением ёмкости; удаление или обновление помечает матрицу на пересборку.
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.tokens = np.full((0, 1), -1, dtype=np.int32)
+        self.size = 0
+        self.dirty = True
+
+    def rebuild(self, rows: List[Tuple[int, List[int]]]):
+        width = max((len(token_ids) for _, token_ids in rows), default=1) or 1
+        capacity = max(len(rows), 16)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.lengths = np.zeros(capacity, dtype=np.int64)
+        self.tokens = np.full((capacity, width), -1, dtype=np.int32)
+        self.size = 0
+        self.dirty = False
+        for qa_id, token_ids in rows:
+            self.append(qa_id, token_ids)
+
+    def append(self, qa_id: int, token_ids: List[int]) -> bool:
+        """Дописывает строку; False, если она не влезает по ширине и нужна пересборка"""
+        if len(token_ids) > self.tokens.shape[1]:
+            return False
+        if self.size == len(self.ids):
+            capacity = max(2 * len(self.ids), 16)
+            self.ids = np.resize(self.ids, capacity)
+            self.lengths = np.resize(self.lengths, capacity)
+            tokens = np.full((capacity, self.tokens.shape[1]), -1, dtype=np.int32)
+            tokens[:self.size] = self.tokens[:self.size]
+            self.tokens = tokens
+
+        self.ids[self.size] = qa_id
+        self.lengths[self.size] = len(token_ids)
+        self.tokens[self.size, :len(token_ids)] = token_ids
+        self.size += 1
+        return True
+
+    def common_words(self, word_token_ids: List[List[int]], counts: List[int], vocabulary_size: int):
+        """
+        Число слов запроса, частично совпавших хотя бы с одним словом каждого вопроса.
+
+        :param word_token_ids: Для каждого различного слова запроса - id совпадающих слов словаря
+        :param counts: Сколько раз каждое различное слово встречается в запросе
+        """
+        tokens = self.tokens[:self.size]
+        common = np.zeros(self.size, dtype=np.int64)
+
+        # Каждое слово запроса - отдельный бит, обрабатываем группами по 64
+        for start in range(0, len(word_token_ids), 64):
+            group = word_token_ids[start:start + 64]
+            # Последний элемент - для пустых ячеек (-1)
+            vocabulary_bits = np.zeros(vocabulary_size + 1, dtype=np.uint64)
+            for bit, token_ids in enumerate(group):
+                if token_ids:
+                    vocabulary_bits[token_ids] |= np.uint64(1 << bit)
+
+            row_bits = np.bitwise_or.reduce(vocabulary_bits[tokens], axis=1)
+            for bit, count in enumerate(counts[start:start + 64]):
+                common += ((row_bits >> np.uint64(bit)) & np.uint64(1)).astype(np.int64) * count
+
+        return common
+
+
+class QAIndex:
+    """
+    Инвертированный индекс: нормализованное слово -> id вопросов.
+
+    Хранит в памяти слова каждого вопроса и позволяет оценивать только
+    тех кандидатов, у которых есть хотя бы одно слово, содержащее слово
+    запроса или содержащееся в нём. Остальные строки имеют схожесть 0
+    и не могут стать лучшим совпадением.
+    """
+
+    def __init__(self):
+        self._questions: Dict[int, List[str]] = {}
+        # слово -> id вопросов, в которых оно встречается
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        # подстрока -> слова словаря, которые её содержат
+        self._containing: Dict[str, Set[str]] = defaultdict(set)
+        # слово -> id в словаре матрицы
+        self._token_ids: Dict[str, int] = {}
+        self._matrix = TokenMatrix() if np is not None else None
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __contains__(self, qa_id: int) -> bool:
+        return qa_id in self._questions
+
+    def add(self, qa_id: int, normalized_question: str):
+        """Добавление (или обновление) вопроса в индексе"""
+        if qa_id in self._questions:
+            self.remove(qa_id)
+
+        words = normalized_question.split()
+        self._questions[qa_id] = words
+
+        for word in set(words):
+            if word not in self._postings:
+                for substring in _substrings(word):
+                    self._containing[substring].add(word)
+            self._postings[word].add(qa_id)
+            self._token_ids.setdefault(word, len(self._token_ids))
+
+        if self._matrix is not None and not self._matrix.dirty:
+            token_ids = [self._token_ids[word] for word in words]
+            if not self._matrix.append(qa_id, token_ids):
+                self._matrix.dirty = True
+
+    def remove(self, qa_id: int):
+        """Удаление вопроса из индекса"""
+        words = self._questions.pop(qa_id, None)
+        if words is None:
+            return
+
+        if self._matrix is not None:
+            self._matrix.dirty = True
+
+        for word in set(words):
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            postings.discard(qa_id)
+            if not postings:
+                del self._postings[word]
+                for substring in _substrings(word):
+                    containing = self._containing.get(substring)
+                    if containing is not None:
+                        containing.discard(word)
+                        if not containing:
+                            del self._containing[substring]
+
+    def matching_words(self, word: str) -> Set[str]:
+        """
+        Слова словаря, частично совпадающие со словом запроса:
+        содержащие его или содержащиеся в нём
+        """
+        matches = set(self._containing.get(word, ()))
+        matches.update(s for s in _substrings(word) if s in self._postings)
+        return matches
+
+    def candidates(self, words: List[str], min_common: int = 1) -> Set[int]:
+        """
+        id вопросов, у которых может быть не меньше min_common общих слов.
+
+        Строка с min_common совпавшими словами запроса обязательно совпадает
+        хотя бы с одним из (len(words) - min_common + 1) самых редких слов,
+        поэтому кандидаты набираются только по ним.
+        """
+        matched = {word: self.matching_words(word) for word in set(words)}
+        cost = {
+            word: sum(len(self._postings[token]) for token in tokens)
+            for word, tokens in matched.items()
+        }
+        prefix = sorted(words, key=lambda word: cost[word])[:len(words) - min_common + 1]
+
+        candidate_ids: Set[int] = set()
+        for word in set(prefix):
+            for token in matched[word]:
+                candidate_ids.update(self._postings[token])
+        return candidate_ids
+
+    def _min_common(self, words: List[str], similarity_threshold: float) -> Optional[int]:
+        """Минимальное число общих слов, при котором порог ещё достижим"""
+        return next(
+            (common for common in range(1, len(words) + 1)
+             if (common / len(words)) * 100 >= similarity_threshold),
+            None
+        )
+
+    def best_match(self, normalized_question: str, similarity_threshold: float = 70) -> Tuple[Optional[int], float]:
+        """
+        Поиск лучшего совпадения среди кандидатов.
+
+        Результат совпадает с полным перебором в порядке id: побеждает
+        первая строка с максимальной схожестью не ниже порога.
+        """
+        words = normalized_question.split()
+        if not words:
+            return None, 0
+
+        min_common = self._min_common(words, similarity_threshold)
+        if min_common is None:
+            return None, 0
+
+        candidate_ids = self.candidates(words, min_common)
+        logger.debug(f"QA index candidates: {len(candidate_ids)} of {len(self._questions)}")
+
+        best_id = None
+        best_similarity = 0
+        for qa_id in sorted(candidate_ids):
+            db_words = self._questions[qa_id]
+
+            # Верхняя граница схожести, если совпадут все слова запроса
+            if len(db_words) > len(words) and (len(words) / len(db_words)) * 100 < similarity_threshold:
+                continue
+
+            similarity = word_similarity(words, db_words)
+            if similarity > best_similarity and similarity >= similarity_threshold:
+                best_id = qa_id
+                best_similarity = similarity
+
+        return best_id, best_similarity
+
+    def top_k(self, normalized_question: str, k: int = 5, similarity_threshold: float = 70) -> List[Tuple[int, float]]:
+        """
+        k лучших вопросов со схожестью не ниже порога.
+
+        С NumPy запрос оценивается против всего корпуса одним векторизованным
+        проходом по матрице слов, иначе - по кандидатам из инвертированного индекса.
+        Порядок: по убыванию схожести, при равенстве - по id.
+
+        :return: Список пар (id вопроса, схожесть в процентах)
+        """
+        words = normalized_question.split()
+        if not words or k <= 0:
+            return []
+
+        if self._matrix is None:
+            min_common = self._min_common(words, similarity_threshold)
+            if min_common is None:
+                return []
+            scored = [
+                (qa_id, word_similarity(words, self._questions[qa_id]))
+                for qa_id in self.candidates(words, min_common)
+            ]
+            scored = [(qa_id, score) for qa_id, score in scored if score > 0 and score >= similarity_threshold]
+            scored.sort(key=lambda item: (-item[1], item[0]))
+            return scored[:k]
+
+        if self._matrix.dirty:
+            self._matrix.rebuild([
+                (qa_id, [self._token_ids[word] for word in db_words])
+                for qa_id, db_words in sorted(self._questions.items())
+            ])
+
+        distinct = list(dict.fromkeys(words))
+        word_token_ids = [
+            [self._token_ids[token] for token in self.matching_words(word)]
+            for word in distinct
+        ]
+        counts = [words.count(word) for word in distinct]
+
+        matrix = self._matrix
+        common = matrix.common_words(word_token_ids, counts, len(self._token_ids))
+        lengths = matrix.lengths[:matrix.size]
+        similarity = (common / np.maximum(lengths, len(words))) * 100
+
+        selected = np.nonzero((similarity > 0) & (similarity >= similarity_threshold) & (lengths > 0))[0]
+        ids = matrix.ids[selected]
+        scores = similarity[selected]
+        order = np.lexsort((ids, -scores))[:k]
+        return [(int(ids[i]), float(scores[i])) for i in order]
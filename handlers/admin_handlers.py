@@ -3,17 +3,25 @@ from telegram.ext import ContextTypes
 from services.google_ai import GoogleAIService
 from services.scraper import Scraper
 from database.db_manager import DBManager
+from database.async_db_manager import AsyncDBManager
 from services.post_generator import PostGenerator
+from services.draft_pool import DraftPool
+from config.config import DRAFT_POOL_SIZE, STREAM_RESPONSES, STREAM_EDIT_INTERVAL, BACKGROUND_TASKS_ENABLED
+from utils.stream_renderer import StreamRenderer
 import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AdminHandler:
-    def __init__(self, ai_service: GoogleAIService, scraper: Scraper):
+    def __init__(self, ai_service: GoogleAIService, scraper: Scraper, db: AsyncDBManager = None):
         self.ai_service = ai_service
         self.scraper = scraper
-        self.post_generator = PostGenerator(self.ai_service, self.scraper)
+        self.post_generator = PostGenerator(self.ai_service, self.scraper, db=db)
+        self.draft_pool = (
+            DraftPool(self.post_generator, categories=["parenting"])
+            if DRAFT_POOL_SIZE > 0 and BACKGROUND_TASKS_ENABLED else None
+        )
         self.CHANNEL_ID = "@neurolife_clinic"  # ID канала для публикации
 
     async def generate_post(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -23,13 +31,20 @@ class AdminHandler:
         if update.effective_user.id not in context.bot_data.get('admin_ids', []):
             return
 
-        status_message = await update.message.reply_text("🔄 Генерирую пост...")
+        # Готовый черновик из пула отдаем сразу, генерируем только если пул пуст
+        post = await self.draft_pool.pop("parenting") if self.draft_pool else None
+        status_message = None if post else await update.message.reply_text("🔄 Генерирую пост...")
+
+        # Текст поста выводится в сообщение о статусе по мере генерации
+        renderer = StreamRenderer(status_message, interval=STREAM_EDIT_INTERVAL) if status_message and STREAM_RESPONSES else None
 
         try:
-            post = await self.post_generator.generate_ai_post(
-                category="parenting",
-                post_type="advice"
-            )
+            if not post:
+                post = await self.post_generator.generate_ai_post(
+                    category="parenting",
+                    post_type="advice",
+                    on_partial=(lambda text: renderer.update(f"🔄 Генерирую пост...\n\n{text}")) if renderer else None
+                )
 
             if post:
                 keyboard = [[
@@ -39,17 +54,25 @@ class AdminHandler:
                 
                 context.user_data['current_post'] = post  # Сохраняем текущий пост
 
-                await update.message.reply_text(
-                    f"🤖 Новый пост:\n\n{post}",
-                    reply_markup=InlineKeyboardMarkup(keyboard)
-                )
-                await status_message.delete()
+                if renderer:
+                    await renderer.finish(f"🤖 Новый пост:\n\n{post}", reply_markup=InlineKeyboardMarkup(keyboard))
+                else:
+                    await update.message.reply_text(
+                        f"🤖 Новый пост:\n\n{post}",
+                        reply_markup=InlineKeyboardMarkup(keyboard)
+                    )
+                    if status_message:
+                        await status_message.delete()
             else:
                 await status_message.edit_text("❌ Не удалось сгенерировать пост")
 
         except Exception as e:
             logger.error(f"Ошибка генерации: {str(e)}", exc_info=True)
-            await status_message.edit_text("❌ Произошла ошибка при генерации поста")
+            error_text = "❌ Произошла ошибка при генерации поста"
+            if status_message:
+                await status_message.edit_text(error_text)
+            else:
+                await update.message.reply_text(error_text)
             
     async def edit_post(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
@@ -1,40 +1,55 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from services.google_ai import GoogleAIService
+from services.google_ai import GoogleAIService, AnswerUnavailable
+from database.async_db_manager import AsyncDBManager
 from database.db_manager import DBManager
-from config.config import ADMIN_IDS
-import time
-from collections import defaultdict
+from services.semantic_cache import SemanticCache
+from services.answer_batcher import AnswerBatcher
+from utils.rate_limiter import RateLimiter
+from utils.single_flight import SingleFlight
+from utils.stream_renderer import StreamRenderer
+from utils.text_processor import format_message
+from config.config import (
+    ADMIN_IDS, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE, STREAM_RESPONSES, STREAM_EDIT_INTERVAL,
+    ANSWER_BATCH_ENABLED, RATE_LIMIT_MAX_REQUESTS, RATE_LIMIT_WINDOW,
+    RATE_LIMIT_GLOBAL_MAX_REQUESTS, RATE_LIMIT_GLOBAL_WINDOW, RATE_LIMIT_SHARED_PATH
+)
+import asyncio
+import logging
 
-class RateLimiter:
-    def __init__(self, max_requests=10, time_window=60):
-        self.request_counts = defaultdict(list)
-        self.max_requests = max_requests
-        self.time_window = time_window
-
-    def is_allowed(self, user_id):
-        current_time = time.time()
-        user_requests = self.request_counts[user_id]
-        # Удаляем устаревшие запросы
-        user_requests[:] = [t for t in user_requests if current_time - t < self.time_window]
-        
-        if len(user_requests) >= self.max_requests:
-            return False
-        
-        user_requests.append(current_time)
-        return True
+logger = logging.getLogger(__name__)
 
 class UserHandler:
-    def __init__(self):
-        self.ai_service = GoogleAIService()
-        self.db = DBManager()
-        self.rate_limiter = RateLimiter()
+    def __init__(self, ai_service: GoogleAIService = None, db: AsyncDBManager = None):
+        self.ai_service = ai_service or GoogleAIService()
+        self.db = db or AsyncDBManager()
+        self.rate_limiter = RateLimiter(
+            max_requests=RATE_LIMIT_MAX_REQUESTS,
+            time_window=RATE_LIMIT_WINDOW,
+            global_max_requests=RATE_LIMIT_GLOBAL_MAX_REQUESTS,
+            global_time_window=RATE_LIMIT_GLOBAL_WINDOW,
+            shared_path=RATE_LIMIT_SHARED_PATH or None
+        )
+        self.semantic_cache = SemanticCache(
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            max_size=SEMANTIC_CACHE_SIZE
+        )
+        # Одинаковые вопросы, заданные одновременно, - один запрос к ИИ и одна запись в БД
+        self.single_flight = SingleFlight()
+        # Различные одновременные вопросы - один пакетный запрос к ИИ
+        self.answer_batcher = AnswerBatcher(self.ai_service) if ANSWER_BATCH_ENABLED else None
+
+    async def warm_up(self):
+        """Прогрев семантического кэша сохраненными вопросами"""
+        pairs = await self.db.get_recent_qa(limit=SEMANTIC_CACHE_SIZE)
+        # Более старые - первыми, чтобы свежие оказались в конце LRU
+        self.semantic_cache.warm(reversed(pairs))
 
     async def handle_question(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
         
         # Проверка rate limit для всех пользователей
-        if not self.rate_limiter.is_allowed(user_id):
+        if not await self.rate_limiter.ais_allowed(user_id):
             await update.message.reply_text("Слишком много запросов. Пожалуйста, подождите.")
             return
 
@@ -51,19 +66,81 @@ class UserHandler:
             return
 
         # Проверяем, есть ли ответ в базе данных
-        qa = self.db.get_qa(question)
+        qa = await self.db.get_qa(question)
         if qa:
             await update.message.reply_text(qa.answer)
             return
 
+        # Перефразированный вопрос - ответ из локального семантического кэша
+        cached_answer = self.semantic_cache.lookup(question)
+        if cached_answer:
+            await update.message.reply_text(cached_answer)
+            return
+
         # Если ответа нет в базе, генерируем новый с помощью AI
-        answer = self.ai_service.answer_question(question, None)
+        if STREAM_RESPONSES and not self.answer_batcher:
+            # Ответ выводится по мере генерации; при одновременных одинаковых вопросах
+            # поток видит первый спросивший, остальные получают итоговый текст
+            renderer = StreamRenderer(
+                await update.message.reply_text("✍️ Готовлю ответ..."),
+                interval=STREAM_EDIT_INTERVAL
+            )
+            answer = await self.single_flight.do(
+                DBManager.normalize_text(question),
+                lambda: self._stream_and_store(question, renderer)
+            )
+            await renderer.finish(answer)
+            return
         
-        # Сохраняем новый вопрос и ответ
-        self.db.add_qa(question, answer)
+        answer = await self.single_flight.do(
+            DBManager.normalize_text(question),
+            lambda: self._generate_and_store(question)
+        )
         
         await update.message.reply_text(answer)
 
+    async def _generate_and_store(self, question):
+        """
+        Генерация ответа и сохранение новой пары вопрос-ответ
+
+        Отказ и ошибки генерации только возвращаются пользователю, но не сохраняются:
+        иначе сбой модели стал бы постоянным ответом на этот и похожие вопросы.
+        """
+        try:
+            if self.answer_batcher:
+                answer = await self.answer_batcher.answer(question)
+            else:
+                answer = await self.ai_service.answer_question(question, None)
+        except AnswerUnavailable as e:
+            return e.reply
+        # Форматирование как у потокового ответа
+        answer = format_message(answer)
+        
+        # Сохраняем новый вопрос и ответ
+        await self.db.add_qa(question, answer)
+        self.semantic_cache.add(question, answer)
+        return answer
+
+    async def _stream_and_store(self, question, renderer: StreamRenderer):
+        """Потоковая генерация ответа с выводом в сообщение и сохранение итогового текста"""
+        try:
+            text = await renderer.render(self.ai_service.answer_question_stream(question, None))
+        except AnswerUnavailable as e:
+            return e.reply
+        except asyncio.TimeoutError:
+            return "Извините, ответ занял слишком много времени. Попробуйте позже."
+        except Exception as e:
+            logger.error(f"Ошибка потоковой генерации ответа: {str(e)}", exc_info=True)
+            return f"Извините, произошла ошибка при генерации ответа: {str(e)}"
+        
+        if not text.strip():
+            return "Извините, не удалось сгенерировать ответ. Попробуйте позже."
+        
+        answer = format_message(text)
+        await self.db.add_qa(question, answer)
+        self.semantic_cache.add(question, answer)
+        return answer
+
     def contains_dangerous_content(self, text):
         # Расширенный список запрещенных слов
         forbidden_words = [
@@ -3,11 +3,15 @@ import sys
 import logging
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler
-from config.config import TELEGRAM_TOKEN, ADMIN_IDS
+from config.config import TELEGRAM_TOKEN, ADMIN_IDS, CRAWL_ENABLED, BOT_MODE, BACKGROUND_TASKS_ENABLED
 from handlers.admin_handlers import AdminHandler
 from handlers.user_handlers import UserHandler
 from services.google_ai import GoogleAIService
 from services.scraper import Scraper
+from services.scrape_scheduler import ScrapeScheduler
+from services.crawler import Crawler
+from services.webhook_server import WebhookServer
+from database.async_db_manager import AsyncDBManager
 import logging
 from logging.handlers import RotatingFileHandler
 
@@ -47,10 +51,20 @@ logger = logging.getLogger(__name__)
 class TelegramBot:
     def __init__(self):
         self.application = None
+        self.admin_handler = None
+        self.user_handler = None
+        self.webhook_server = None
         self.should_stop = False
         # Initialize services that will be passed to handlers
         self.ai_service = GoogleAIService()
         self.scraper = Scraper()
+        self.db = AsyncDBManager()
+        # Фоновые задачи - только в процессе с BACKGROUND_TASKS_ENABLED
+        self.scrape_scheduler = ScrapeScheduler(
+            self.scraper,
+            db=self.db,
+            crawler=Crawler(self.scraper) if CRAWL_ENABLED else None
+        ) if BACKGROUND_TASKS_ENABLED else None
 
     async def setup(self):
         """Initialize bot and handlers"""
@@ -58,11 +72,12 @@ class TelegramBot:
         self.application = Application.builder().token(TELEGRAM_TOKEN).build()
         
         # Initialize handlers with required services
-        admin_handler = AdminHandler(
+        self.admin_handler = admin_handler = AdminHandler(
             ai_service=self.ai_service,
-            scraper=self.scraper
+            scraper=self.scraper,
+            db=self.db
         )
-        user_handler = UserHandler()
+        self.user_handler = UserHandler(ai_service=self.ai_service, db=self.db)
 
         # Register command handlers
         self.application.add_handler(CommandHandler("generate", admin_handler.generate_post))
@@ -79,7 +94,7 @@ class TelegramBot:
         
         self.application.add_handler(MessageHandler(
             filters.TEXT & ~filters.COMMAND,
-            user_handler.handle_question
+            self.user_handler.handle_question
         ))
 
         # Store admin IDs in bot data
@@ -90,19 +105,46 @@ class TelegramBot:
         """Start the bot"""
         logger.info('Starting bot...')
         await self.setup()
-        await self.application.initialize()
-        await self.application.start()
-        await self.application.updater.start_polling(drop_pending_updates=True)
-        
+
         try:
+            # Любая ошибка запуска (неверный токен, сеть, занятый порт) проходит
+            # через finally, иначе сессия, пул соединений и фоновые задачи останутся открытыми
+            await self.db.init()
+            await self.user_handler.warm_up()
+            await self.scraper.start()
+            await self.application.initialize()
+            await self.application.start()
+
+            # Фоновые задачи - только после успешного запуска приложения
+            if self.scrape_scheduler:
+                self.scrape_scheduler.start()
+            if self.admin_handler.draft_pool:
+                self.admin_handler.draft_pool.start()
+
+            if BOT_MODE == 'webhook':
+                self.webhook_server = WebhookServer(self.application)
+                await self.webhook_server.start()
+            else:
+                await self.application.updater.start_polling(drop_pending_updates=True)
+
             # Keep the bot running until stop signal
             while not self.should_stop:
                 await asyncio.sleep(1)
         finally:
             logger.info('Stopping bot...')
-            await self.application.updater.stop()
-            await self.application.stop()
+            if self.webhook_server:
+                await self.webhook_server.stop()
+            elif self.application.updater.running:
+                await self.application.updater.stop()
+            if self.application.running:
+                await self.application.stop()
             await self.application.shutdown()
+            if self.admin_handler.draft_pool:
+                await self.admin_handler.draft_pool.stop()
+            if self.scrape_scheduler:
+                await self.scrape_scheduler.stop()
+            await self.scraper.close()
+            await self.db.close()
 
 def run_bot():
     """Run the bot with proper async handling"""
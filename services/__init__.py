@@ -1,5 +1,5 @@
-from .google_ai import GoogleAIService
+from .google_ai import GoogleAIService, AnswerUnavailable
 from .scraper import Scraper
 from .post_generator import PostGenerator
 
-__all__ = ['GoogleAIService', 'Scraper', 'PostGenerator']
\ No newline at end of file
+__all__ = ['GoogleAIService', 'AnswerUnavailable', 'Scraper', 'PostGenerator']
\ No newline at end of file
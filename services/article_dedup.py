@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from database.db_manager import DBManager
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy сигнатуры считаются на чистом Python, значения те же
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Простое число Мерсенна 2^31 - 1: a * x + b помещается в uint64
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+class ArticleDeduplicator:
+    """
+    Индекс отпечатков MinHash/LSH уже использованных статей.
+
+    Сигнатура строится по шинглам (тройкам слов) из заголовка и текста,
+    LSH разбивает её на полосы: кандидатами считаются статьи, совпавшие
+    хотя бы в одной полосе, а дубликатом - кандидат с оценкой
+    сходства Жаккара не ниже порога. Отпечатки хранятся в локальном
+    sqlite-файле и загружаются в память при старте.
+
+    Поиск идет только по индексу в памяти. Из асинхронного кода
+    используйте afilter_new/aadd: подсчет сигнатур и запись в sqlite
+    выполняются в отдельном потоке, индекс меняется в цикле событий.
+    """
+
+    def __init__(self, path: str = 'article_fingerprints.db', num_perm: int = 128,
+                 bands: int = 16, threshold: float = 0.8, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        # Параметры перестановок фиксированы seed'ом: сигнатуры совместимы между запусками
+        rng = random.Random(seed)
+        self._a = [rng.randrange(1, MERSENNE_PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, MERSENNE_PRIME) for _ in range(num_perm)]
+        if np is not None:
+            self._a_np = np.array(self._a, dtype=np.uint64)
+            self._b_np = np.array(self._b, dtype=np.uint64)
+
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [defaultdict(list) for _ in range(bands)]
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "key TEXT PRIMARY KEY, signature BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _load(self):
+        for key, blob in self._connection.execute("SELECT key, signature FROM fingerprints"):
+            signature = array('I')
+            signature.frombytes(blob)
+            if len(signature) == self.num_perm:
+                self._index(key, tuple(signature))
+        logger.info(f"Загружено {len(self._signatures)} отпечатков статей из {self.path}")
+
+    def _index(self, key: str, signature: Tuple[int, ...]):
+        self._signatures[key] = signature
+        for band in range(self.bands):
+            self._buckets[band][signature[band * self.rows:(band + 1) * self.rows]].append(key)
+
+    @staticmethod
+    def _text(article: Dict) -> str:
+        return DBManager.normalize_text(f"{article.get('title') or ''} {article.get('content') or ''}")
+
+    @classmethod
+    def article_key(cls, article: Dict) -> str:
+        """Точный отпечаток статьи (хэш нормализованного текста)"""
+        return hashlib.sha1(cls._text(article).encode('utf-8')).hexdigest()
+
+    def signature(self, article: Dict) -> Tuple[int, ...]:
+        """MinHash-сигнатура статьи"""
+        words = self._text(article).split()
+        shingles = {' '.join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))} or {''}
+        hashes = [zlib.crc32(shingle.encode('utf-8')) % MERSENNE_PRIME for shingle in shingles]
+
+        if np is not None:
+            values = np.array(hashes, dtype=np.uint64)
+            permuted = (np.outer(self._a_np, values) + self._b_np[:, None]) % MERSENNE_PRIME
+            return tuple(int(value) for value in permuted.min(axis=1))
+
+        return tuple(
+            min((a * value + b) % MERSENNE_PRIME for value in hashes)
+            for a, b in zip(self._a, self._b)
+        )
+
+    def signatures(self, articles: List[Dict]) -> List[Tuple[int, ...]]:
+        return [self.signature(article) for article in articles]
+
+    def find_duplicate(self, article: Dict, signature: Optional[Tuple[int, ...]] = None) -> Optional[str]:
+        """
+        Поиск ранее использованной статьи, близкой к данной
+
+        :return: Ключ найденного дубликата или None
+        """
+        signature = signature or self.signature(article)
+
+        candidates = set()
+        for band in range(self.bands):
+            candidates.update(self._buckets[band].get(signature[band * self.rows:(band + 1) * self.rows], ()))
+
+        for key in candidates:
+            stored = self._signatures[key]
+            similarity = sum(1 for x, y in zip(signature, stored) if x == y) / self.num_perm
+            if similarity >= self.threshold:
+                return key
+        return None
+
+    def is_duplicate(self, article: Dict) -> bool:
+        return self.find_duplicate(article) is not None
+
+    def add(self, article: Dict):
+        """Запоминает статью как использованную"""
+        key = self.article_key(article)
+        if key in self._signatures:
+            return
+
+        signature = self.signature(article)
+        self._index(key, signature)
+        self._store(key, signature)
+
+    async def aadd(self, article: Dict):
+        key = self.article_key(article)
+        if key in self._signatures:
+            return
+
+        signature = await asyncio.to_thread(self.signature, article)
+        if key in self._signatures:
+            return
+        self._index(key, signature)
+        await asyncio.to_thread(self._store, key, signature)
+
+    def _store(self, key: str, signature: Tuple[int, ...]):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO fingerprints (key, signature, created_at) VALUES (?, ?, ?)",
+                (key, array('I', signature).tobytes(), time.time())
+            )
+
+    def filter_new(self, articles: List[Dict]) -> List[Dict]:
+        """Статьи, не похожие на уже использованные"""
+        return self._filter(articles, self.signatures(articles))
+
+    async def afilter_new(self, articles: List[Dict]) -> List[Dict]:
+        signatures = await asyncio.to_thread(self.signatures, articles) if articles else []
+        return self._filter(articles, signatures)
+
+    def _filter(self, articles: List[Dict], signatures: List[Tuple[int, ...]]) -> List[Dict]:
+        fresh = [
+            article for article, signature in zip(articles, signatures)
+            if self.find_duplicate(article, signature) is None
+        ]
+        if len(fresh) < len(articles):
+            logger.info(f"Пропущено {len(articles) - len(fresh)} уже использованных статей")
+        return fresh
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
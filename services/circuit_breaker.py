@@ -0,0 +1,153 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+@dataclass
+class HostHealth:
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    # Сглаженные (EWMA) доля ошибок и время ответа
+    error_rate: float = 0.0
+    latency: Optional[float] = None
+    opened_at: float = 0.0
+    cooldown: float = 0.0
+    probe_in_flight: bool = False
+    probe_started: float = 0.0
+
+
+class CircuitBreaker:
+    """
+    Учет состояния хостов источников с автоматом closed / open / half-open.
+
+    После failure_threshold ошибок подряд хост считается недоступным (open)
+    и запросы к нему сразу отклоняются, пока не истечет пауза. Затем один
+    пробный запрос (half-open): успех закрывает автомат, ошибка открывает
+    его снова с удвоенной паузой (не больше max_cooldown). Ошибками считаются
+    сетевые сбои, таймауты и ответы 429/5xx.
+
+    Вызывающий код после allow() обязан вызвать record_success/record_failure
+    или release() (в finally - на случай отмены). Пробный запрос, не
+    завершившийся за probe_timeout секунд, считается потерянным, и
+    разрешается новый.
+    """
+
+    def __init__(self, failure_threshold: int = 3, base_cooldown: float = 60,
+                 max_cooldown: float = 1800, smoothing: float = 0.3, max_backoff: float = 10,
+                 probe_timeout: float = 120):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+        self.max_backoff = max_backoff
+        self.probe_timeout = probe_timeout
+        self._hosts: Dict[str, HostHealth] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or url).lower()
+
+    def health(self, url: str) -> HostHealth:
+        return self._hosts.setdefault(self._host(url), HostHealth())
+
+    def _probe_pending(self, health: HostHealth) -> bool:
+        return health.probe_in_flight and time.monotonic() - health.probe_started < self.probe_timeout
+
+    def is_open(self, url: str) -> bool:
+        """Хост отключен: пауза еще не истекла или уже идет пробный запрос"""
+        health = self._hosts.get(self._host(url))
+        if health is None:
+            return False
+        if health.state == OPEN:
+            return time.monotonic() - health.opened_at < health.cooldown
+        return health.state == HALF_OPEN and self._probe_pending(health)
+
+    def allow(self, url: str) -> bool:
+        """Можно ли сейчас отправить запрос к хосту"""
+        health = self.health(url)
+        if health.state == CLOSED:
+            return True
+        if health.state == OPEN:
+            if time.monotonic() - health.opened_at < health.cooldown:
+                return False
+            health.state = HALF_OPEN
+            health.probe_in_flight = False
+            logger.info(f"Хост {self._host(url)}: пробный запрос после паузы {health.cooldown:.0f} с")
+        # half-open: пропускаем только один пробный запрос
+        if self._probe_pending(health):
+            return False
+        health.probe_in_flight = True
+        health.probe_started = time.monotonic()
+        return True
+
+    def release(self, url: str):
+        """Запрос после allow() завершился без результата (отменен): пробный запрос снова разрешен"""
+        health = self._hosts.get(self._host(url))
+        if health is not None and health.state == HALF_OPEN:
+            health.probe_in_flight = False
+
+    def _observe(self, health: HostHealth, failed: bool, latency: Optional[float]):
+        health.error_rate += self.smoothing * ((1.0 if failed else 0.0) - health.error_rate)
+        if latency is not None:
+            health.latency = latency if health.latency is None else (
+                health.latency + self.smoothing * (latency - health.latency)
+            )
+
+    def record_success(self, url: str, latency: Optional[float] = None):
+        health = self.health(url)
+        self._observe(health, False, latency)
+        if health.state != CLOSED:
+            logger.info(f"Хост {self._host(url)} снова доступен")
+        health.state = CLOSED
+        health.consecutive_failures = 0
+        health.cooldown = 0.0
+        health.probe_in_flight = False
+
+    def record_failure(self, url: str, latency: Optional[float] = None):
+        health = self.health(url)
+        self._observe(health, True, latency)
+        health.consecutive_failures += 1
+        health.probe_in_flight = False
+
+        if health.state == HALF_OPEN:
+            cooldown = min(max(health.cooldown, self.base_cooldown) * 2, self.max_cooldown)
+        elif health.state == CLOSED and health.consecutive_failures >= self.failure_threshold:
+            cooldown = self.base_cooldown
+        else:
+            return
+
+        health.state = OPEN
+        health.opened_at = time.monotonic()
+        health.cooldown = cooldown
+        logger.warning(f"Хост {self._host(url)} временно отключен на {cooldown:.0f} с")
+
+    def backoff(self, url: str, attempt: int) -> float:
+        """
+        Пауза перед повторной попыткой
+
+        Растет экспоненциально от наблюдаемого времени ответа хоста и
+        увеличивается с долей ошибок; случайная добавка разводит повторы.
+        """
+        health = self.health(url)
+        base = max(health.latency or 1.0, 0.5) * (1 + health.error_rate)
+        delay = min(base * 2 ** attempt, self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            host: {
+                'state': health.state,
+                'error_rate': round(health.error_rate, 3),
+                'latency': round(health.latency, 3) if health.latency is not None else None,
+            }
+            for host, health in self._hosts.items()
+        }
@@ -0,0 +1,190 @@
+import asyncio
+import dataclasses
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from urllib.parse import urldefrag, urljoin, urlparse
+import logging
+
+from config.config import (
+    MedicalSource, CRAWL_MAX_PAGES, CRAWL_MAX_DEPTH, CRAWL_CONCURRENCY, CRAWL_HOST_DELAY
+)
+from services.scraper import Scraper
+
+logger = logging.getLogger(__name__)
+
+LISTING = 'listing'
+DETAIL = 'detail'
+
+
+@dataclass
+class CrawlState:
+    """Состояние обхода одного источника"""
+    source: MedicalSource
+    host: str
+    max_pages: int
+    frontier: asyncio.Queue = field(default_factory=asyncio.Queue)
+    seen: Set[str] = field(default_factory=set)
+    pages: int = 0
+    articles: List[Dict] = field(default_factory=list)
+
+
+class Crawler:
+    """
+    Обход источника по страницам списка и ссылкам на статьи.
+
+    Со стартовой страницы источника берутся ссылки на статьи (селекторы
+    'link') и ссылка на следующую страницу (MedicalSource.pagination['next']).
+    Каждый адрес посещается один раз, ссылки на другие сайты не
+    отслеживаются. Запросы к одному хосту идут не чаще раза в host_delay
+    секунд, общее число одновременных запросов ограничено concurrency.
+    Глубина и число страниц на источник ограничены max_depth и max_pages
+    (pagination['max_pages'] переопределяет последний).
+
+    Статьи со страниц статей извлекаются селекторами источника или
+    pagination['title'] / pagination['content'], если они заданы.
+    """
+
+    def __init__(self, scraper: Scraper, max_pages: int = CRAWL_MAX_PAGES, max_depth: int = CRAWL_MAX_DEPTH,
+                 concurrency: int = CRAWL_CONCURRENCY, host_delay: float = CRAWL_HOST_DELAY):
+        self.scraper = scraper
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.host_delay = host_delay
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        self._host_next: Dict[str, float] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        host = (urlparse(url).hostname or '').lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _enqueue(self, state: CrawlState, url: Optional[str], base_url: str, depth: int, kind: str):
+        if not url or depth > self.max_depth:
+            return
+        url = urldefrag(urljoin(base_url, url.strip()))[0]
+        if urlparse(url).scheme not in ('http', 'https') or self._host(url) != state.host:
+            return
+        if url in state.seen:
+            return
+        state.seen.add(url)
+        state.frontier.put_nowait((url, depth, kind))
+
+    async def _wait_politely(self, host: str):
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._host_next.get(host, 0.0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._host_next[host] = time.monotonic() + self.host_delay
+
+    async def _fetch(self, state: CrawlState, url: str) -> Optional[str]:
+        # Пауза до занятия слота: ожидание одного хоста не держит слоты остальных
+        await self._wait_politely(state.host)
+        async with self._semaphore:
+            return await self.scraper.fetch_page(state.source, url)
+
+    def _extract_links(self, state: CrawlState, html: str, page_url: str, depth: int):
+        source = state.source
+        parser = self.scraper.parser_for(source)
+        document = parser.parse(html)
+
+        link_selectors = source.selectors.get('link') or []
+        if isinstance(link_selectors, str):
+            link_selectors = [link_selectors]
+        for selector in link_selectors:
+            try:
+                elements = parser.select(document, selector)
+            except Exception as e:
+                logger.warning(f"Ошибка при поиске ссылок с селектором {selector}: {str(e)}")
+                continue
+            for element in elements:
+                href = parser.attr(element, 'href')
+                if href is None:
+                    anchor = parser.select_one(element, 'a[href]')
+                    href = parser.attr(anchor, 'href') if anchor is not None else None
+                self._enqueue(state, href, page_url, depth + 1, DETAIL)
+
+        next_selector = (source.pagination or {}).get('next')
+        if next_selector:
+            try:
+                next_link = parser.select_one(document, next_selector)
+            except Exception as e:
+                logger.warning(f"Ошибка при поиске следующей страницы {page_url}: {str(e)}")
+                next_link = None
+            if next_link is not None:
+                self._enqueue(state, parser.attr(next_link, 'href'), page_url, depth + 1, LISTING)
+
+    def _detail_source(self, source: MedicalSource) -> MedicalSource:
+        pagination = source.pagination or {}
+        selectors = {
+            'title': pagination.get('title') or source.selectors.get('title', []),
+            'content': pagination.get('content') or source.selectors.get('content', []),
+        }
+        return dataclasses.replace(source, selectors=selectors)
+
+    async def _worker(self, state: CrawlState, detail_source: MedicalSource):
+        while True:
+            url, depth, kind = await state.frontier.get()
+            try:
+                if state.pages >= state.max_pages:
+                    continue
+                state.pages += 1
+
+                html = await self._fetch(state, url)
+                if html is None:
+                    continue
+
+                if kind == LISTING:
+                    self._extract_links(state, html, url, depth)
+                else:
+                    article = await self.scraper.parse_page(
+                        detail_source, html, page_url=url, source_key=f"{state.source.url}#detail"
+                    )
+                    if article:
+                        state.articles.append(article)
+            except Exception as e:
+                logger.error(f"Ошибка при обходе {url}: {str(e)}")
+            finally:
+                state.frontier.task_done()
+
+    async def crawl(self, source: MedicalSource, html: Optional[str] = None) -> List[Dict]:
+        """
+        Обход источника
+
+        :param html: Уже загруженная стартовая страница; без нее она загружается заново
+        :return: Полные статьи со страниц статей в формате Scraper.scrape_medical_source
+        """
+        if self.scraper.breaker.is_open(source.url) or not await self.scraper.check_host_availability(source.url):
+            return []
+
+        pagination = source.pagination or {}
+        state = CrawlState(
+            source=source,
+            host=self._host(source.url),
+            max_pages=int(pagination.get('max_pages', self.max_pages))
+        )
+        if html is not None:
+            state.seen.add(urldefrag(source.url)[0])
+            state.pages += 1
+            self._extract_links(state, html, source.url, 0)
+        else:
+            self._enqueue(state, source.url, source.url, 0, LISTING)
+
+        started = time.monotonic()
+        detail_source = self._detail_source(source)
+        workers = [asyncio.create_task(self._worker(state, detail_source)) for _ in range(self.concurrency)]
+        try:
+            await state.frontier.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        logger.info(
+            f"Обход {source.name}: {state.pages} страниц, {len(state.articles)} статей "
+            f"за {time.monotonic() - started:.1f} с"
+        )
+        return state.articles
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Optional, Set
+import logging
+
+from config.config import DRAFT_POOL_SIZE, DRAFT_POOL_CONCURRENCY, DRAFT_POOL_MAX_AGE
+from services.post_generator import PostGenerator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Draft:
+    text: str
+    category: str
+    # Статья-источник, зарезервированная в генераторе до выдачи черновика
+    article: Optional[Dict] = None
+    created_at: float = field(default_factory=time.time)
+
+
+class DraftPool:
+    """
+    Запас заранее сгенерированных постов по категориям.
+
+    Пул в фоне пополняется до target_size черновиков на категорию, не
+    больше concurrency генераций одновременно. Черновики старше max_age
+    секунд выбрасываются. pop() отдает готовый черновик сразу и запускает
+    пополнение. Статья черновика помечается использованной только при
+    выдаче; у выброшенного черновика она возвращается в оборот.
+    """
+
+    def __init__(self, generator: PostGenerator, categories: Iterable[str], post_type: str = 'advice',
+                 target_size: int = DRAFT_POOL_SIZE, concurrency: int = DRAFT_POOL_CONCURRENCY,
+                 max_age: float = DRAFT_POOL_MAX_AGE):
+        self.generator = generator
+        self.categories = list(categories)
+        self.post_type = post_type
+        self.target_size = target_size
+        self.max_age = max_age
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._drafts: Dict[str, Deque[Draft]] = {category: deque() for category in self.categories}
+        self._pending: Dict[str, int] = {category: 0 for category in self.categories}
+        self._tasks: Set[asyncio.Task] = set()
+        self._maintenance: Optional[asyncio.Task] = None
+
+    def size(self, category: str) -> int:
+        return len(self._drafts.get(category, ()))
+
+    def start(self):
+        """Первичное заполнение и периодическая проверка устаревания"""
+        for category in self.categories:
+            self.refill(category)
+        if self._maintenance is None or self._maintenance.done():
+            self._maintenance = asyncio.create_task(self._maintain())
+        logger.info(f"Пул черновиков запущен: {self.target_size} на категорию")
+
+    async def stop(self):
+        tasks = list(self._tasks)
+        if self._maintenance is not None:
+            tasks.append(self._maintenance)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._maintenance = None
+        logger.info("Пул черновиков остановлен")
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(max(self.max_age / 2, 60))
+            for category in self.categories:
+                self.refill(category)
+
+    def _drop_stale(self, category: str):
+        drafts = self._drafts[category]
+        deadline = time.time() - self.max_age
+        while drafts and drafts[0].created_at < deadline:
+            draft = drafts.popleft()
+            if draft.article is not None:
+                self.generator.release_article(draft.article)
+            logger.info(f"Устаревший черновик для '{category}' удален")
+
+    async def pop(self, category: str) -> Optional[str]:
+        """
+        Готовый черновик категории (самый старый из свежих) или None
+
+        В любом случае запускает пополнение пула.
+        """
+        if category not in self._drafts:
+            return None
+        self._drop_stale(category)
+        draft = self._drafts[category].popleft() if self._drafts[category] else None
+        self.refill(category)
+        if draft is None:
+            return None
+        if draft.article is not None:
+            await self.generator.consume_article(draft.article)
+        return draft.text
+
+    def refill(self, category: str):
+        """Запуск генерации недостающих черновиков"""
+        self._drop_stale(category)
+        missing = self.target_size - len(self._drafts[category]) - self._pending[category]
+        for _ in range(max(missing, 0)):
+            self._pending[category] += 1
+            task = asyncio.create_task(self._generate(category))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _generate(self, category: str):
+        try:
+            async with self._semaphore:
+                # Без кэша ответов модели: черновики одной темы должны различаться
+                text, article = await self.generator.generate_post_draft(
+                    category=category, post_type=self.post_type, use_cache=False
+                )
+            if text:
+                self._drafts[category].append(Draft(text, category, article))
+                logger.info(f"Черновик для '{category}' готов, в пуле {len(self._drafts[category])}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка генерации черновика для '{category}': {str(e)}", exc_info=True)
+        finally:
+            self._pending[category] -= 1
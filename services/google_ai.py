@@ -1,26 +1,151 @@
 import asyncio
 import google.generativeai as genai
-from config.config import GOOGLE_AI_API_KEY
+from config.config import (
+    GOOGLE_AI_API_KEY, AI_MAX_CONCURRENCY, AI_REQUEST_TIMEOUT,
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTLS
+)
+from services.llm_cache import LLMCache
+
+
+class AnswerUnavailable(Exception):
+    """
+    The question was refused or the model call failed.
+    
+    Attributes:
+        reply (str): Message for the user. It is not an answer and must
+            not be stored as one.
+    """
+    
+    def __init__(self, reply):
+        super().__init__(reply)
+        self.reply = reply
+
 
 class GoogleAIService:
-    def __init__(self):
+    def __init__(self, max_concurrency=AI_MAX_CONCURRENCY, timeout=AI_REQUEST_TIMEOUT):
         genai.configure(api_key=GOOGLE_AI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model_name = 'gemini-2.0-flash'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.timeout = timeout
+        self.cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES) if LLM_CACHE_ENABLED else None
+        # Ограничение одновременных запросов к Gemini
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Счетчики запросов и токенов по usage_metadata ответов модели
+        self.usage = {'requests': 0, 'prompt_tokens': 0, 'response_tokens': 0}
+
+    async def _call_model(self, prompt):
+        async with self._semaphore:
+            response = await self.model.generate_content_async(prompt)
+        self._record_usage(response)
+        return response.text
 
-    async def generate_post(self, scraped_data):
-        prompt = f"""
+    def _record_usage(self, response):
+        metadata = getattr(response, 'usage_metadata', None)
+        self.usage['requests'] += 1
+        self.usage['prompt_tokens'] += getattr(metadata, 'prompt_token_count', 0) or 0
+        self.usage['response_tokens'] += getattr(metadata, 'candidates_token_count', 0) or 0
+
+    async def generate(self, prompt, timeout=None, cache_site=None, use_cache=True):
+        """
+        Non-blocking generation with a concurrency limit and a deadline.
+        
+        Args:
+            prompt (str): The prompt to send to the model.
+            timeout (float, optional): Deadline in seconds, including the wait
+                for a free concurrency slot. Defaults to AI_REQUEST_TIMEOUT.
+            cache_site (str, optional): Call site name from LLM_CACHE_TTLS;
+                responses are cached only when it is given.
+            use_cache (bool): Set to False to bypass the cache for this call.
+        
+        Returns:
+            str: The generated text.
+        
+        Raises:
+            asyncio.TimeoutError: If the deadline expires; the request is cancelled.
+        """
+        cache = self.cache if use_cache and cache_site else None
+        if cache:
+            cached = await cache.aget(self.model_name, prompt, site=cache_site)
+            if cached is not None:
+                return cached
+        
+        text = await asyncio.wait_for(self._call_model(prompt), timeout or self.timeout)
+        
+        if cache and text:
+            await cache.aset(self.model_name, prompt, text, ttl=LLM_CACHE_TTLS.get(cache_site, 0))
+        return text
+
+    async def generate_stream(self, prompt, timeout=None, cache_site=None, use_cache=True):
+        """
+        Streaming generation: yields text chunks as the model produces them.
+        
+        Takes the same concurrency slot, deadline and cache as generate();
+        the deadline includes the wait for a free slot. A cached response
+        is yielded as a single chunk. The response is cached only after it
+        has been received completely and is not empty.
+        
+        Args:
+            prompt (str): The prompt to send to the model.
+            timeout (float, optional): Deadline in seconds for the whole
+                response, including the wait for a concurrency slot.
+                Defaults to AI_REQUEST_TIMEOUT.
+            cache_site (str, optional): Call site name from LLM_CACHE_TTLS.
+            use_cache (bool): Set to False to bypass the cache for this call.
+        
+        Yields:
+            str: The next piece of the generated text.
+        
+        Raises:
+            asyncio.TimeoutError: If the deadline expires while waiting for
+                a slot or mid-stream.
+        """
+        cache = self.cache if use_cache and cache_site else None
+        if cache:
+            cached = await cache.aget(self.model_name, prompt, site=cache_site)
+            if cached is not None:
+                yield cached
+                return
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        parts = []
+        await asyncio.wait_for(self._semaphore.acquire(), deadline - loop.time())
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, stream=True), deadline - loop.time()
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+            self._record_usage(response)
+        finally:
+            self._semaphore.release()
+        
+        text = ''.join(parts)
+        if cache and text:
+            await cache.aset(self.model_name, prompt, text, ttl=LLM_CACHE_TTLS.get(cache_site, 0))
+
+    @staticmethod
+    def _post_prompt(scraped_data):
+        return f"""
         На основе следующей информации создайте интересный пост для Telegram:
         {scraped_data}
         
         Пост должен быть информативным, легко читаемым и привлекательным для аудитории.
         """
-        # Запускаем синхронный метод в отдельном потоке
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: self.model.generate_content(prompt)
-        )
-        return result.text
+
+    async def generate_post(self, scraped_data, cache_site=None, use_cache=True):
+        return await self.generate(self._post_prompt(scraped_data), cache_site=cache_site, use_cache=use_cache)
+
+    def generate_post_stream(self, scraped_data, cache_site=None, use_cache=True):
+        """Streaming counterpart of generate_post(); see generate_stream()."""
+        return self.generate_stream(self._post_prompt(scraped_data), cache_site=cache_site, use_cache=use_cache)
 
     def _is_toxic_content(self, text):
         """
@@ -55,7 +180,7 @@ class GoogleAIService:
         # In a real-world scenario, you might want to use the actual tokenizer from the AI library
         return len(text.split())
 
-    def _generate_answer(self, question):
+    async def _generate_answer(self, question):
         """
         Generate an AI-powered answer for the given question.
         
@@ -64,23 +189,28 @@ class GoogleAIService:
         
         Returns:
             str: The generated answer.
+        
+        Raises:
+            AnswerUnavailable: If the request timed out or failed.
         """
         try:
-            result = self.model.generate_content(question)
-            return result.text
+            return await self.generate(question, cache_site='answer')
+        except asyncio.TimeoutError:
+            raise AnswerUnavailable("Извините, ответ занял слишком много времени. Попробуйте позже.")
         except Exception as e:
-            return f"Извините, произошла ошибка при генерации ответа: {str(e)}"
+            raise AnswerUnavailable(f"Извините, произошла ошибка при генерации ответа: {str(e)}")
 
-    def answer_question(self, question, context):
+    def reject_question(self, question):
         """
-        Main method to answer questions with safety checks.
+        Safety checks shared by answer_question(), answer_question_stream()
+        and callers that send questions to the model in their own prompts
+        (AnswerBatcher).
         
         Args:
-            question (str): The question to answer.
-            context (str, optional): Additional context for the question.
+            question (str): The question to check.
         
         Returns:
-            str: The generated answer or an error message.
+            str or None: The refusal message, or None if the question is acceptable.
         """
         # Проверка токсичности контента перед генерацией
         if self._is_toxic_content(question):
@@ -90,6 +220,47 @@ class GoogleAIService:
         # Ограничение количества токенов
         if self._count_tokens(question) > MAX_TOKENS:
             return "Слишком длинный запрос."
+        return None
+
+    async def answer_question(self, question, context):
+        """
+        Main method to answer questions with safety checks.
+        
+        Args:
+            question (str): The question to answer.
+            context (str, optional): Additional context for the question.
+        
+        Returns:
+            str: The generated answer.
+        
+        Raises:
+            AnswerUnavailable: If the question is refused or generation fails.
+        """
+        rejection = self.reject_question(question)
+        if rejection:
+            raise AnswerUnavailable(rejection)
         
         # Основная логика генерации ответа
-        return self._generate_answer(question)
\ No newline at end of file
+        return await self._generate_answer(question)
+
+    async def answer_question_stream(self, question, context):
+        """
+        Streaming counterpart of answer_question().
+        
+        Args:
+            question (str): The question to answer.
+            context (str, optional): Additional context for the question.
+        
+        Yields:
+            str: Pieces of the answer.
+        
+        Raises:
+            AnswerUnavailable: If the question is refused.
+            asyncio.TimeoutError: If the deadline expires mid-stream.
+        """
+        rejection = self.reject_question(question)
+        if rejection:
+            raise AnswerUnavailable(rejection)
+        
+        async for chunk in self.generate_stream(question, cache_site='answer'):
+            yield chunk
\ No newline at end of file
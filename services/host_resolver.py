@@ -0,0 +1,71 @@
+import asyncio
+import socket
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HostResolver:
+    """
+    Асинхронный кэш доступности хостов (DNS).
+
+    Разрешение имени идет через loop.getaddrinfo и не блокирует цикл событий.
+    Успешные и неуспешные результаты кэшируются с разными TTL,
+    одновременные проверки одного хоста объединяются в один запрос.
+    """
+
+    def __init__(self, positive_ttl: float = 300, negative_ttl: float = 60):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        # хост -> (доступен, момент истечения)
+        self._cache: Dict[str, Tuple[bool, float]] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def is_available(self, url: str) -> bool:
+        """Разрешается ли хост из URL (результат берется из кэша, если он свежий)"""
+        host = urlparse(url).hostname
+        if not host:
+            return False
+
+        cached = self._cached(host)
+        if cached is not None:
+            return cached
+
+        task = self._in_flight.get(host)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(host))
+            self._in_flight[host] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(host, None))
+        return await asyncio.shield(task)
+
+    def _cached(self, host: str) -> Optional[bool]:
+        entry = self._cache.get(host)
+        if entry is None:
+            return None
+        available, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._cache[host]
+            return None
+        return available
+
+    async def _resolve(self, host: str) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            available = True
+        except (socket.gaierror, OSError) as e:
+            logger.error(f"Хост {host} недоступен: {e}")
+            available = False
+
+        ttl = self.positive_ttl if available else self.negative_ttl
+        self._cache[host] = (available, time.monotonic() + ttl)
+        return available
+
+    def invalidate(self, url: str):
+        """Сброс закэшированного результата для хоста из URL"""
+        host = urlparse(url).hostname
+        if host:
+            self._cache.pop(host, None)
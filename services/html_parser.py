@@ -0,0 +1,210 @@
+from typing import Any, Dict, List, Optional
+import logging
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import HTMLTranslator
+except ImportError:  # без lxml/cssselect доступен только html.parser
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+# Текст этих тегов BeautifulSoup не включает в get_text()
+SKIPPED_TEXT_TAGS = frozenset({'script', 'style', 'template'})
+
+
+class HTMLParserBackend:
+    """
+    Общий интерфейс разбора HTML для скрапера.
+
+    Узлы документа у каждой реализации свои; снаружи с ними работают
+    только через методы backend'а. Результаты text() совпадают с
+    BeautifulSoup.get_text(strip=True): строки очищаются от пробелов
+    по краям и склеиваются без разделителя, комментарии и содержимое
+    script/style пропускаются.
+    """
+
+    name = ''
+
+    def parse(self, html: str) -> Any:
+        raise NotImplementedError
+
+    def select(self, node: Any, selector: str) -> List[Any]:
+        """Потомки узла, подходящие под CSS-селектор, в порядке документа"""
+        raise NotImplementedError
+
+    def select_one(self, node: Any, selector: str) -> Optional[Any]:
+        elements = self.select(node, selector)
+        return elements[0] if elements else None
+
+    def select_first(self, node: Any, *selectors: str) -> Optional[Any]:
+        """Первый найденный элемент по списку селекторов в порядке приоритета"""
+        for selector in selectors:
+            element = self.select_one(node, selector)
+            # Пустой элемент lxml ложен в булевом контексте, поэтому сравнение с None
+            if element is not None:
+                return element
+        return None
+
+    def text(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(HTMLParserBackend):
+    """BeautifulSoup со встроенным html.parser (чистый Python)"""
+
+    name = 'html.parser'
+
+    def parse(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, 'html.parser')
+
+    def select(self, node, selector: str) -> List[Any]:
+        return node.select(selector)
+
+    def select_one(self, node, selector: str) -> Optional[Any]:
+        return node.select_one(selector)
+
+    def text(self, node) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        value = node.get(name)
+        return ' '.join(value) if isinstance(value, list) else value
+
+
+class LxmlBackend(HTMLParserBackend):
+    """lxml.html (libxml2) с CSS-селекторами, скомпилированными в XPath"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        if lxml is None:
+            raise ImportError("Для backend'а lxml нужны пакеты lxml и cssselect")
+        self._translator = HTMLTranslator()
+        self._compiled: Dict[tuple, Any] = {}
+
+    def parse(self, html: str):
+        if not html.strip():
+            html = '<html></html>'
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # Строки с объявлением кодировки lxml принимает только байтами
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+
+    def _xpath(self, selector: str, prefix: str):
+        key = (selector, prefix)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = etree.XPath(self._translator.css_to_xpath(selector, prefix=prefix))
+            self._compiled[key] = compiled
+        return compiled
+
+    def select(self, node, selector: str) -> List[Any]:
+        # select() у BeautifulSoup включает корневой <html> документа, но не сам узел-элемент
+        prefix = 'descendant-or-self::' if node.getparent() is None else 'descendant::'
+        return self._xpath(selector, prefix)(node)
+
+    def text(self, node) -> str:
+        parts = []
+        self._collect_text(node, parts)
+        return ''.join(part for part in (part.strip() for part in parts) if part)
+
+    def _collect_text(self, node, parts: List[str]):
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            if isinstance(child.tag, str) and child.tag not in SKIPPED_TEXT_TAGS:
+                self._collect_text(child, parts)
+            # Хвостовой текст после комментария или script - часть родителя
+            if child.tail:
+                parts.append(child.tail)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class SelectolaxBackend(HTMLParserBackend):
+    """selectolax на движке lexbor"""
+
+    name = 'selectolax'
+
+    def __init__(self):
+        if LexborHTMLParser is None:
+            raise ImportError("Для backend'а selectolax нужен пакет selectolax")
+
+    def parse(self, html: str):
+        return LexborHTMLParser(html)
+
+    def select(self, node, selector: str) -> List[Any]:
+        # lexbor возвращает узел повторно, если он подходит под несколько селекторов группы,
+        # и включает в результат сам узел-элемент
+        seen = {node.mem_id} if not isinstance(node, LexborHTMLParser) else set()
+        elements = []
+        for element in node.css(selector):
+            if element.mem_id not in seen:
+                seen.add(element.mem_id)
+                elements.append(element)
+        return elements
+
+    def text(self, node) -> str:
+        parts = []
+        self._collect_text(node, parts)
+        return ''.join(part for part in (part.strip() for part in parts) if part)
+
+    def _collect_text(self, node, parts: List[str]):
+        child = node.child
+        while child is not None:
+            if child.is_text_node:
+                parts.append(child.text_content or '')
+            elif child.is_element_node and child.tag not in SKIPPED_TEXT_TAGS:
+                self._collect_text(child, parts)
+            child = child.next
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+
+PARSER_BACKENDS = {
+    BeautifulSoupBackend.name: BeautifulSoupBackend,
+    LxmlBackend.name: LxmlBackend,
+    SelectolaxBackend.name: SelectolaxBackend,
+}
+
+_instances: Dict[str, HTMLParserBackend] = {}
+
+
+def get_parser(name: Optional[str] = None) -> HTMLParserBackend:
+    """
+    Экземпляр backend'а разбора по имени
+
+    Если имя неизвестно или библиотека не установлена, используется html.parser.
+    """
+    name = name or BeautifulSoupBackend.name
+    parser = _instances.get(name)
+    if parser is not None:
+        return parser
+
+    backend = PARSER_BACKENDS.get(name)
+    if backend is None:
+        logger.warning(f"Неизвестный парсер HTML '{name}', используется html.parser")
+        return get_parser(BeautifulSoupBackend.name)
+    try:
+        parser = backend()
+    except ImportError as e:
+        logger.warning(f"{e}, используется html.parser")
+        return get_parser(BeautifulSoupBackend.name)
+
+    _instances[name] = parser
+    return parser
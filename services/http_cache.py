@@ -0,0 +1,232 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: float
+    body: str
+    parsed: Any
+    parser_key: Optional[str]
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.fresh_until > time.time()
+
+
+class HTTPCache:
+    """
+    Дисковый HTTP-кэш страниц для условных GET-запросов.
+
+    Для каждого URL хранятся ETag/Last-Modified, тело ответа и результат
+    его разбора. Пока запись свежая (Cache-Control: max-age или max-age по
+    умолчанию для серверов без валидаторов), сеть не используется; после -
+    отправляется If-None-Match/If-Modified-Since, и на 304 переиспользуется
+    сохраненный результат. Общий размер ограничен, вытесняются давно
+    не читанные записи.
+
+    Для страниц, прочитанных не полностью (complete=False), хранится
+    только результат разбора без тела и валидаторов: обрезанное тело
+    нельзя ни разобрать заново, ни подтвердить ответом 304.
+
+    Как и в LLMCache, время последнего чтения копится в памяти и
+    записывается пачкой раз в access_flush_interval секунд (и перед
+    вытеснением), общий размер ведется в памяти. Из асинхронного кода
+    кэш вызывается через aget/astore/aupdate_parsed/amark_not_modified,
+    которые выполняют запросы к sqlite в отдельном потоке.
+    """
+
+    def __init__(self, path: str = 'http_cache.db', max_bytes: int = 50 * 1024 * 1024, default_max_age: float = 300,
+                 access_flush_interval: float = 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_max_age = default_max_age
+        self.access_flush_interval = access_flush_interval
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        # url -> время последнего чтения, еще не записанное в БД
+        self._accessed: Dict[str, float] = {}
+        self._next_flush = time.time() + access_flush_interval
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fresh_until REAL NOT NULL, "
+                "body TEXT NOT NULL, parsed TEXT, parser_key TEXT, size INTEGER NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_http_cache_last_access ON http_cache (last_access)"
+            )
+        self._total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            return self._get(url)
+
+    def store(self, url: str, headers, body: str, parsed: Any, parser_key: Optional[str] = None,
+              complete: bool = True):
+        """Сохранение ответа 200 вместе с результатом разбора"""
+        with self._lock:
+            self._store(url, headers, body, parsed, parser_key, complete)
+
+    def update_parsed(self, url: str, parsed: Any, parser_key: Optional[str]):
+        """Замена результата разбора (например, после смены селекторов)"""
+        with self._lock:
+            self._update_parsed(url, parsed, parser_key)
+
+    def mark_not_modified(self, entry: CachedResponse, headers):
+        """Ответ 304: запись остается актуальной, обновляется срок свежести"""
+        with self._lock:
+            self._mark_not_modified(entry, headers)
+
+    async def aget(self, url: str) -> Optional[CachedResponse]:
+        return await asyncio.to_thread(self.get, url)
+
+    async def astore(self, url: str, headers, body: str, parsed: Any, parser_key: Optional[str] = None,
+                     complete: bool = True):
+        await asyncio.to_thread(self.store, url, headers, body, parsed, parser_key, complete)
+
+    async def aupdate_parsed(self, url: str, parsed: Any, parser_key: Optional[str]):
+        await asyncio.to_thread(self.update_parsed, url, parsed, parser_key)
+
+    async def amark_not_modified(self, entry: CachedResponse, headers):
+        await asyncio.to_thread(self.mark_not_modified, entry, headers)
+
+    def _get(self, url: str) -> Optional[CachedResponse]:
+        row = self._connection.execute(
+            "SELECT etag, last_modified, fresh_until, body, parsed, parser_key FROM http_cache WHERE url = ?",
+            (url,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        self._accessed[url] = now
+        if now >= self._next_flush:
+            self._flush_access()
+        etag, last_modified, fresh_until, body, parsed, parser_key = row
+        entry = CachedResponse(url, etag, last_modified, fresh_until, body,
+                               json.loads(parsed) if parsed is not None else None, parser_key)
+        if entry.is_fresh:
+            self.hits += 1
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedResponse]) -> Dict[str, str]:
+        """Заголовки If-None-Match / If-Modified-Since для повторной проверки"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def _fresh_until(self, headers, has_validators: bool = False) -> float:
+        cache_control = headers.get('Cache-Control', '')
+        if 'no-store' in cache_control or 'no-cache' in cache_control:
+            return 0.0
+        match = re.search(r'max-age=(\d+)', cache_control)
+        if match:
+            return time.time() + int(match.group(1))
+        # Без валидаторов повторная проверка невозможна - используем max-age по умолчанию
+        if not has_validators and not headers.get('ETag') and not headers.get('Last-Modified'):
+            return time.time() + self.default_max_age
+        return 0.0
+
+    def _flush_access(self):
+        """Запись накопленного времени последнего чтения"""
+        self._next_flush = time.time() + self.access_flush_interval
+        if not self._accessed:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE http_cache SET last_access = ? WHERE url = ?",
+                [(accessed, url) for url, accessed in self._accessed.items()]
+            )
+        self._accessed.clear()
+
+    def _store(self, url: str, headers, body: str, parsed: Any, parser_key: Optional[str], complete: bool):
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return
+        if not complete:
+            body = ''
+            headers = {'Cache-Control': headers.get('Cache-Control', '')}
+        parsed_json = json.dumps(parsed, ensure_ascii=False) if parsed is not None else None
+        size = len(body.encode('utf-8')) + len((parsed_json or '').encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._connection:
+            previous = self._connection.execute("SELECT size FROM http_cache WHERE url = ?", (url,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(url, etag, last_modified, fresh_until, body, parsed, parser_key, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get('ETag'), headers.get('Last-Modified'), self._fresh_until(headers),
+                 body, parsed_json, parser_key, size, now)
+            )
+        self._accessed.pop(url, None)
+        self._total += size - (previous[0] if previous else 0)
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def _update_parsed(self, url: str, parsed: Any, parser_key: Optional[str]):
+        parsed_json = json.dumps(parsed, ensure_ascii=False) if parsed is not None else None
+        with self._connection:
+            self._connection.execute(
+                "UPDATE http_cache SET parsed = ?, parser_key = ? WHERE url = ?",
+                (parsed_json, parser_key, url)
+            )
+
+    def _mark_not_modified(self, entry: CachedResponse, headers):
+        self.revalidated += 1
+        has_validators = bool(entry.etag or entry.last_modified)
+        with self._connection:
+            self._connection.execute(
+                "UPDATE http_cache SET fresh_until = ? WHERE url = ?",
+                (self._fresh_until(headers, has_validators), entry.url)
+            )
+        self._accessed[entry.url] = time.time()
+
+    def _evict(self):
+        self._flush_access()
+        total = self._total
+        evicted = 0
+        with self._connection:
+            for url, size in self._connection.execute(
+                "SELECT url, size FROM http_cache ORDER BY last_access"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._connection.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+                total -= size
+                evicted += 1
+        self._total = total
+        logger.info(f"HTTP-кэш: вытеснено {evicted} страниц")
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._flush_access()
+            self._connection.close()
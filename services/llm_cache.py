@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """
+    Дисковый кэш ответов модели в локальном sqlite-файле.
+
+    Ключ - хэш имени модели и промпта. У каждой записи свой срок жизни
+    (TTL задается местом вызова), при превышении max_entries вытесняются
+    давно не читанные записи (LRU). Статистика попаданий ведется по местам вызова.
+
+    Время последнего чтения копится в памяти и записывается пачкой раз в
+    access_flush_interval секунд (и перед вытеснением), а не при каждом
+    попадании. Из асинхронного кода кэш вызывается через aget/aset, которые
+    выполняют запросы к sqlite в отдельном потоке.
+    """
+
+    def __init__(self, path: str = 'llm_cache.db', max_entries: int = 10000, access_flush_interval: float = 30):
+        self.path = path
+        self.max_entries = max_entries
+        self.access_flush_interval = access_flush_interval
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+        # ключ -> время последнего чтения, еще не записанное в БД
+        self._accessed: Dict[str, float] = {}
+        self._next_flush = time.time() + access_flush_interval
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)"
+            )
+        self._size = self._connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, model: str, prompt: str, site: str = 'default') -> Optional[str]:
+        """Ответ из кэша или None, если записи нет или она устарела"""
+        with self._lock:
+            return self._get(model, prompt, site)
+
+    def set(self, model: str, prompt: str, response: str, ttl: float):
+        """Сохранение ответа на ttl секунд"""
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._set(model, prompt, response, ttl)
+
+    async def aget(self, model: str, prompt: str, site: str = 'default') -> Optional[str]:
+        return await asyncio.to_thread(self.get, model, prompt, site)
+
+    async def aset(self, model: str, prompt: str, response: str, ttl: float):
+        if ttl <= 0:
+            return
+        await asyncio.to_thread(self.set, model, prompt, response, ttl)
+
+    def _get(self, model: str, prompt: str, site: str) -> Optional[str]:
+        key = self.make_key(model, prompt)
+        now = time.time()
+        row = self._connection.execute(
+            "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or row[1] <= now:
+            if row is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._size -= 1
+                self._accessed.pop(key, None)
+            self._misses[site] += 1
+            return None
+
+        self._accessed[key] = now
+        if now >= self._next_flush:
+            self._flush_access()
+        self._hits[site] += 1
+        logger.debug(f"LLM cache hit ({site})")
+        return row[0]
+
+    def _flush_access(self):
+        """Запись накопленного времени последнего чтения"""
+        self._next_flush = time.time() + self.access_flush_interval
+        if not self._accessed:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()]
+            )
+        self._accessed.clear()
+
+    def _set(self, model: str, prompt: str, response: str, ttl: float):
+        key = self.make_key(model, prompt)
+        now = time.time()
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO llm_cache (key, model, response, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now + ttl, now)
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                self._connection.execute(
+                    "UPDATE llm_cache SET response = ?, created_at = ?, expires_at = ?, last_access = ? "
+                    "WHERE key = ?",
+                    (response, now, now + ttl, now, key)
+                )
+        self._accessed.pop(key, None)
+
+        if self._size > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        # Удаляем с запасом (10%), чтобы не чистить кэш на каждой записи
+        excess = self._size - self.max_entries + max(self.max_entries // 10, 1)
+        self._flush_access()
+        with self._connection:
+            # Сначала устаревшие записи, затем давно не читанные
+            expired = self._connection.execute(
+                "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            if excess > expired:
+                self._connection.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                    (excess - expired,)
+                )
+        self._size = self._connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        logger.info(f"LLM cache eviction: {self._size} entries left")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Попадания, промахи и доля попаданий по местам вызова"""
+        result = {}
+        for site in set(self._hits) | set(self._misses):
+            hits, misses = self._hits[site], self._misses[site]
+            result[site] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+        return result
+
+    def close(self):
+        with self._lock:
+            self._flush_access()
+            self._connection.close()
@@ -1,10 +1,12 @@
 import random
 import re
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Callable, Awaitable, Set
 from datetime import datetime
-from config.config import POST_TEMPLATES
+from config.config import POST_TEMPLATES, ARTICLE_FINGERPRINTS_PATH, ARTICLE_DEDUP_THRESHOLD, POST_SINGLE_PASS
 from services.google_ai import GoogleAIService
 from services.scraper import Scraper
+from services.article_dedup import ArticleDeduplicator
+from database.async_db_manager import AsyncDBManager
 from utils.text_processor import clean_text, format_message
 import logging
 
@@ -18,6 +20,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Разделители ответа в однопроходном режиме
+STRUCTURE_MARKER = '===СТРУКТУРА==='
+POST_MARKER = '===ПОСТ==='
+POST_MARKER_RE = re.compile(r'[=*#\s]*={2,}\s*ПОСТ\s*={2,}[=*\s]*', re.IGNORECASE)
+STRUCTURE_MARKER_RE = re.compile(r'[=*#\s]*={2,}\s*СТРУКТУРА\s*={2,}[=*\s]*', re.IGNORECASE)
+
 class PostGenerator:
     # Оставляем только нужные эмодзи и теги
     EMOJI_MAP = {
@@ -30,9 +38,18 @@ class PostGenerator:
         'default': ['#здоровье']
     }
 
-    def __init__(self, ai_service: GoogleAIService, scraper: Scraper):
+    def __init__(self, ai_service: GoogleAIService, scraper: Scraper, db: Optional[AsyncDBManager] = None,
+                 single_pass: bool = POST_SINGLE_PASS):
         self.ai_service = ai_service
-        self.scraper = Scraper()
+        self.scraper = scraper
+        self.db = db
+        self.single_pass = single_pass
+        self.deduplicator = ArticleDeduplicator(
+            path=ARTICLE_FINGERPRINTS_PATH,
+            threshold=ARTICLE_DEDUP_THRESHOLD
+        )
+        # Статьи черновиков, которые еще не опубликованы и не отброшены (ключи дедупликатора)
+        self._reserved: Set[str] = set()
 
     def extract_key_points(self, text: str, max_points: int = 4, max_length: int = 150) -> str:
         """
@@ -71,21 +88,139 @@ class PostGenerator:
         
         return '\n• ' + '\n• '.join(key_points) if key_points else 'Ключевые моменты не определены'
 
-    async def generate_ai_post(self, category: str, post_type: str = 'advice') -> Optional[str]:
+    @staticmethod
+    def parse_single_pass(response: str) -> Tuple[str, str]:
+        """
+        Разбор ответа однопроходного режима на структуру и текст поста
+        
+        Если модель не поставила разделитель поста, текстом считается весь ответ.
+        """
+        parts = POST_MARKER_RE.split(response, maxsplit=1)
+        if len(parts) < 2:
+            return '', STRUCTURE_MARKER_RE.sub('', response).strip()
+        structure, post = parts
+        return STRUCTURE_MARKER_RE.sub('', structure).strip(), post.strip()
+
+    async def _generate_text(self, prompt: str, cache_site: str, use_cache: bool = True,
+                             on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """
+        Запрос к модели; с on_partial ответ передается туда по мере генерации
+        """
+        if on_partial is None:
+            return await self.ai_service.generate_post(prompt, cache_site=cache_site, use_cache=use_cache)
+        
+        text = ''
+        async for chunk in self.ai_service.generate_post_stream(prompt, cache_site=cache_site, use_cache=use_cache):
+            text += chunk
+            await on_partial(text)
+        return text
+
+    async def _generate_single_pass(self, structure_prompt: str, requirements: str, use_cache: bool = True,
+                                    on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """
+        Структура и наполнение поста одним запросом к модели
+        """
+        async def show_post(text: str):
+            # Структуру не показываем, только текст после разделителя поста
+            parts = POST_MARKER_RE.split(text, maxsplit=1)
+            if len(parts) == 2 and parts[1].strip():
+                await on_partial(parts[1].strip())
+        
+        prompt = f"""
+                    {structure_prompt.strip()}
+
+                    Сначала продумай уникальную структуру поста, затем сразу напиши пост по ней.
+                    Требования к посту:
+                    {requirements.strip()}
+
+                    Ответь строго в формате:
+                    {STRUCTURE_MARKER}
+                    <структура поста кратким списком>
+                    {POST_MARKER}
+                    <готовый текст поста>
+                    """
+        response = await self._generate_text(
+            prompt, 'post_single_pass', use_cache, on_partial=show_post if on_partial else None
+        )
+        structure, post = self.parse_single_pass(response)
+        logger.info(f"Однопроходная генерация: структура {len(structure)} символов, пост {len(post)} символов")
+        return post
+
+    async def _fresh_articles(self, category: str) -> List[Dict]:
+        """
+        Статьи, не похожие на уже использованные: сначала из базы, затем с сайтов
+
+        Статьи из базы, отброшенные как дубликаты, помечаются использованными,
+        иначе они возвращались бы при каждом запросе и закрывали более старые.
+        """
+        if self.db:
+            articles = await self.db.get_fresh_articles(category, limit=20)
+            # Отбрасываем статьи, похожие на уже использованные, до обращения к ИИ
+            fresh = await self.deduplicator.afilter_new(articles)
+            if len(fresh) < len(articles):
+                fresh_ids = {id(article) for article in fresh}
+                await self.db.mark_articles_used([a for a in articles if id(a) not in fresh_ids])
+            fresh = self._unreserved(fresh)
+            if fresh:
+                return fresh
+
+        articles = await self.scraper.scrape_by_category(category)
+        if self.db and articles:
+            await self.db.add_articles(articles)
+        return self._unreserved(await self.deduplicator.afilter_new(articles))
+
+    def _unreserved(self, articles: List[Dict]) -> List[Dict]:
+        return [article for article in articles if self.deduplicator.article_key(article) not in self._reserved]
+
+    async def consume_article(self, article: Dict):
+        """Статья поста использована: больше не выбирается ни из базы, ни как похожая"""
+        self._reserved.discard(self.deduplicator.article_key(article))
+        await self.deduplicator.aadd(article)
+        if self.db:
+            await self.db.mark_article_used(article)
+
+    def release_article(self, article: Dict):
+        """Черновик со статьей отброшен: статья снова доступна"""
+        self._reserved.discard(self.deduplicator.article_key(article))
+
+    async def generate_ai_post(self, category: str, post_type: str = 'advice', use_cache: bool = True,
+                               on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> Optional[str]:
         """
         Генерирует пост с абсолютно уникальной структурой 
         в двух сценариях: с использованием сайтов и полностью через ИИ
+        
+        use_cache=False нужен, когда требуется новый вариант поста, а не сохраненный ответ модели.
+        on_partial получает текст поста по мере генерации (до финальной сборки).
+        """
+        post, source_article = await self.generate_post_draft(category, post_type, use_cache, on_partial)
+        if source_article is not None:
+            await self.consume_article(source_article)
+        return post
+
+    async def generate_post_draft(self, category: str, post_type: str = 'advice', use_cache: bool = True,
+                                  on_partial: Optional[Callable[[str], Awaitable[None]]] = None
+                                  ) -> Tuple[Optional[str], Optional[Dict]]:
         """
+        Пост и статья-источник (None для полной AI-генерации)
+
+        Статья не помечается использованной, а только резервируется, чтобы
+        другие черновики её не выбрали. Вызывающий код должен передать её
+        в consume_article() при использовании поста или в release_article(),
+        если пост отброшен.
+        """
+        source_article = None
         try:
             # Случайный выбор стратегии генерации
             use_articles = random.choice([True, False])
             
             if use_articles:
-                # Попытка найти статьи
-                articles = await self.scraper.scrape_by_category(category or random.choice(['здоровье', 'психология', 'питание']))
+                # Попытка найти статьи: сначала в базе, затем на сайтах
+                category = category or random.choice(['здоровье', 'психология', 'питание'])
+                articles = await self._fresh_articles(category)
                 
                 if articles:
                     source_article = random.choice(articles)
+                    self._reserved.add(self.deduplicator.article_key(source_article))
                     logger.info(f"Выбрана статья: {source_article['title']} из {len(articles)} доступных")
                     
                     # Промпт для создания уникальной структуры на основе статьи
@@ -104,25 +239,32 @@ class PostGenerator:
                     {source_article['content'][:500]}
                     """
 
-                    # Генерация уникальной структуры
-                    unique_structure = await self.ai_service.generate_post(structure_prompt)
+                    if self.single_pass:
+                        raw_content = await self._generate_single_pass(structure_prompt, f"""
+                        - Опираться на содержание статьи: {source_article['content'][:700]}
+                        - Сохранять суть исходной статьи
+                        - Максимально креативно интерпретировать информацию
+                        """, use_cache=use_cache, on_partial=on_partial)
+                    else:
+                        # Генерация уникальной структуры
+                        unique_structure = await self.ai_service.generate_post(structure_prompt, cache_site='post_structure', use_cache=use_cache)
 
-                    # Промпт для наполнения уникальной структуры контентом
-                    content_prompt = f"""
-                    Наполни следующую уникальную структуру контентом из статьи:
+                        # Промпт для наполнения уникальной структуры контентом
+                        content_prompt = f"""
+                        Наполни следующую уникальную структуру контентом из статьи:
 
-                    Структура: {unique_structure}
-                    Исходная статья: "{source_article['title']}"
-                    Содержание статьи: {source_article['content'][:700]}
+                        Структура: {unique_structure}
+                        Исходная статья: "{source_article['title']}"
+                        Содержание статьи: {source_article['content'][:700]}
 
-                    Требования:
-                    - Полностью соответствовать сгенерированной структуре
-                    - Сохранять суть исходной статьи
-                    - Максимально креативно интерпретировать информацию
-                    """
+                        Требования:
+                        - Полностью соответствовать сгенерированной структуре
+                        - Сохранять суть исходной статьи
+                        - Максимально креативно интерпретировать информацию
+                        """
 
-                    # Генерация контента в уникальной структуре
-                    raw_content = await self.ai_service.generate_post(content_prompt)
+                        # Генерация контента в уникальной структуре
+                        raw_content = await self._generate_text(content_prompt, 'post_content', use_cache, on_partial)
                     
                     # Метаданные поста
                     post_content = {
@@ -153,24 +295,30 @@ class PostGenerator:
                 - Целевая аудитория: Родители детей с особенностями развития
                 """
 
-                # Генерация уникальной структуры
-                unique_structure = await self.ai_service.generate_post(structure_prompt)
+                if self.single_pass:
+                    raw_content = await self._generate_single_pass(structure_prompt, """
+                    - Сохранять эмоциональность и креативность
+                    - Избегать прямых инструкций
+                    """, use_cache=use_cache, on_partial=on_partial)
+                else:
+                    # Генерация уникальной структуры
+                    unique_structure = await self.ai_service.generate_post(structure_prompt, cache_site='post_structure', use_cache=use_cache)
 
-                # Промпт для наполнения уникальной структуры контентом
-                content_prompt = f"""
-                Наполни следующую уникальную структуру содержанием:
+                    # Промпт для наполнения уникальной структуры контентом
+                    content_prompt = f"""
+                    Наполни следующую уникальную структуру содержанием:
 
-                Структура: {unique_structure}
-                Тема: {category}
+                    Структура: {unique_structure}
+                    Тема: {category}
 
-                Требования:
-                - Полностью соответствовать сгенерированной структуре
-                - Сохранять эмоциональность и креативность
-                - Избегать прямых инструкций
-                """
+                    Требования:
+                    - Полностью соответствовать сгенерированной структуре
+                    - Сохранять эмоциональность и креативность
+                    - Избегать прямых инструкций
+                    """
 
-                # Генерация контента в уникальной структуре
-                raw_content = await self.ai_service.generate_post(content_prompt)
+                    # Генерация контента в уникальной структуре
+                    raw_content = await self._generate_text(content_prompt, 'post_content', use_cache, on_partial)
                 
                 # Метаданные поста
                 post_content = {
@@ -192,11 +340,13 @@ class PostGenerator:
                 f"{disclaimer}"
             )
             
-            return format_message(final_post)
+            return format_message(final_post), source_article
                 
         except Exception as e:
             logger.error(f"Ошибка при генерации поста с уникальной структурой: {str(e)}", exc_info=True)
-            return None
+            if source_article is not None:
+                self.release_article(source_article)
+            return None, None
 
 
 
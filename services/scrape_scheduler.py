@@ -0,0 +1,96 @@
+import asyncio
+import random
+from typing import Dict, List, Optional
+import logging
+
+from config.config import MedicalSource, MEDICAL_SOURCES, SCRAPING_INTERVAL, SCRAPING_JITTER, SCRAPING_STAGGER
+from services.scraper import Scraper
+from services.crawler import Crawler
+from database.async_db_manager import AsyncDBManager
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeScheduler:
+    """
+    Фоновое обновление всех источников раз в SCRAPING_INTERVAL.
+
+    Интервал случайно смещается на долю jitter, запросы к источникам
+    разнесены на stagger секунд. Если передан crawler, после стартовой
+    страницы обходятся страницы списка и статьи источника. Результаты
+    сохраняются в Scraper и одной пачкой в таблицу статей, и /generate
+    берет их без обращения к сети.
+    """
+
+    def __init__(self, scraper: Scraper, sources: Optional[List[MedicalSource]] = None,
+                 interval: float = SCRAPING_INTERVAL, jitter: float = SCRAPING_JITTER,
+                 stagger: float = SCRAPING_STAGGER, db: Optional[AsyncDBManager] = None,
+                 crawler: Optional[Crawler] = None):
+        self.scraper = scraper
+        self.db = db
+        self.crawler = crawler
+        self.sources = sources if sources is not None else MEDICAL_SOURCES
+        self.interval = interval
+        self.jitter = jitter
+        self.stagger = stagger
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Запуск фонового цикла"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Фоновый скрапинг запущен, интервал {self.interval} с")
+
+    async def stop(self):
+        """Остановка фонового цикла с отменой текущего обновления"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Фоновый скрапинг остановлен")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка фонового скрапинга: {e}", exc_info=True)
+
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(max(delay, 0))
+
+    async def refresh_all(self) -> int:
+        """
+        Обновление всех источников
+
+        :return: Количество успешно обновленных источников
+        """
+        results = await asyncio.gather(
+            *(self._refresh_source(source, index * self.stagger) for index, source in enumerate(self.sources)),
+            return_exceptions=True
+        )
+        refreshed = sum(1 for result in results if isinstance(result, list) and result)
+        articles = [article for result in results if isinstance(result, list) for article in result]
+        if self.db and articles:
+            await self.db.add_articles(articles)
+        logger.info(f"Фоновый скрапинг: обновлено {refreshed} из {len(self.sources)} источников")
+        return refreshed
+
+    async def _refresh_source(self, source: MedicalSource, delay: float) -> List[Dict]:
+        if delay:
+            await asyncio.sleep(delay)
+        articles = []
+        # Для обхода стартовая страница читается целиком и передается обходчику
+        result = await self.scraper.scrape_with_retry(source, full_page=self.crawler is not None)
+        if result:
+            self.scraper.store_prefetched(source, result)
+            articles.append(result)
+        if self.crawler:
+            articles.extend(await self.crawler.crawl(source, html=self.scraper.take_start_page(source.url)))
+        return articles
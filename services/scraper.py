@@ -1,19 +1,36 @@
 import aiohttp
-from bs4 import BeautifulSoup
 import asyncio
-from typing import List, Dict, Optional, Union
+import codecs
+import re
+from typing import Any, List, Dict, Optional, Tuple, Union
 from datetime import datetime
+import hashlib
+import json
 import logging
-from config.config import MedicalSource, MEDICAL_SOURCES
-import socket
-from urllib.parse import urlparse
-from functools import lru_cache
+import time
+from config.config import (
+    MedicalSource, MEDICAL_SOURCES, CONCURRENT_REQUESTS, SCRAPING_INTERVAL,
+    HTTP_CACHE_PATH, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_AGE, HTML_PARSER,
+    LEARNED_SELECTORS_PATH, SCRAPE_STREAMING, SCRAPE_MAX_BYTES,
+    BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN
+)
+from services.host_resolver import HostResolver
+from services.html_parser import HTMLParserBackend, get_parser
+from services.selector_memory import SelectorMemory
+from services.circuit_breaker import CircuitBreaker
+from services.http_cache import HTTPCache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Первая контрольная точка потокового чтения, дальше объем удваивается
+STREAM_FIRST_CHECKPOINT = 64 * 1024
+STREAM_CHUNK_SIZE = 16 * 1024
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
 class Scraper:
-    def __init__(self, timeout: int = 60, max_retries: int = 3):
+    def __init__(self, timeout: int = 60, max_retries: int = 3, concurrent_requests: int = CONCURRENT_REQUESTS,
+                 streaming: bool = SCRAPE_STREAMING, max_bytes: int = SCRAPE_MAX_BYTES):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -21,18 +38,69 @@ class Scraper:
         }
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.max_retries = max_retries
+        self.concurrent_requests = concurrent_requests
+        self.streaming = streaming
+        self.max_bytes = max_bytes
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.resolver = HostResolver()
+        self.http_cache = HTTPCache(HTTP_CACHE_PATH, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_AGE)
+        self.parser = get_parser(HTML_PARSER)
+        self.selector_memory = SelectorMemory(LEARNED_SELECTORS_PATH)
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN)
+        # Результаты фонового скрапинга: имя источника -> (время получения, данные)
+        self.prefetched: Dict[str, Tuple[float, Dict]] = {}
+        self.prefetch_max_age = 2 * SCRAPING_INTERVAL
+        # Полностью прочитанные стартовые страницы для обхода: адрес источника -> HTML
+        self.start_pages: Dict[str, str] = {}
+
+    async def start(self):
+        """Создание общей сессии с пулом keep-alive соединений и кэшем DNS"""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrent_requests * max(len(MEDICAL_SOURCES), 1),
+            limit_per_host=self.concurrent_requests,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+            enable_cleanup_closed=True
+        )
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            timeout=self.timeout,
+            connector=connector
+        )
+        logger.info("Сессия скрапера создана")
+
+    async def close(self):
+        """Закрытие общей сессии"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Сессия скрапера закрыта")
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
 
-    @lru_cache(maxsize=100)
     async def check_host_availability(self, url: str) -> bool:
-        """Кэшированная проверка доступности хоста"""
-        try:
-            parsed_url = urlparse(url)
-            host = parsed_url.netloc
-            socket.gethostbyname(host)
-            return True
-        except socket.gaierror:
-            logger.error(f"Хост {host} недоступен")
-            return False
+        """Кэшированная неблокирующая проверка доступности хоста"""
+        return await self.resolver.is_available(url)
+
+    def store_prefetched(self, source: MedicalSource, result: Dict):
+        """Сохранение результата фонового скрапинга источника"""
+        self.prefetched[source.name] = (time.monotonic(), result)
+
+    def get_prefetched(self, source: MedicalSource) -> Optional[Dict]:
+        """Результат фонового скрапинга, если он не старше prefetch_max_age"""
+        entry = self.prefetched.get(source.name)
+        if entry is None or time.monotonic() - entry[0] > self.prefetch_max_age:
+            return None
+        return entry[1]
+
+    def take_start_page(self, url: str) -> Optional[str]:
+        """HTML стартовой страницы из последнего скрапинга с full_page=True (один раз)"""
+        return self.start_pages.pop(url, None)
 
     async def scrape_by_category(self, category: str, language: str = 'ru') -> List[Dict]:
         """
@@ -61,9 +129,18 @@ class Scraper:
             
             logger.info(f"Найдено {len(filtered_sources)} подходящих источников")
             
+            # Берем результаты фонового скрапинга, в сеть идем только за недостающими
+            prefetched = [self.get_prefetched(source) for source in filtered_sources]
+            missing_sources = [
+                source for source, result in zip(filtered_sources, prefetched) if result is None
+            ]
+            if len(missing_sources) < len(filtered_sources):
+                logger.info(f"Использовано {len(filtered_sources) - len(missing_sources)} предзагруженных результатов")
+            
             # Создаём задачи для асинхронного скрапинга
-            tasks = [self.scrape_with_retry(source) for source in filtered_sources]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            tasks = [self.scrape_with_retry(source) for source in missing_sources]
+            results = [result for result in prefetched if result is not None]
+            results += await asyncio.gather(*tasks, return_exceptions=True)
             
             # Фильтруем успешные результаты
             valid_results = [
@@ -92,24 +169,49 @@ class Scraper:
             logger.warning(f"Ошибка при извлечении ключевых слов: {e}")
             return []
 
-    async def find_content(self, soup: BeautifulSoup, selectors: Dict[str, Union[str, List[str]]]) -> Dict[str, Optional[str]]:
+    async def find_content(self, document: Any, selectors: Dict[str, Union[str, List[str]]],
+                           parser: Optional[HTMLParserBackend] = None,
+                           source_key: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Поиск полей на странице по селекторам источника
+        
+        Как и раньше, поле заполняет последний сработавший селектор каскада:
+        ранние селекторы в списках источников - самые общие ('a', 'div').
+        Поэтому каскад проверяется с конца до первого совпадения, остальные
+        селекторы не нужны.
+
+        Если передан source_key, сначала пробуется селектор, выигравший на
+        прошлых страницах источника; при совпадении каскад не проверяется.
+        Если он не сработал, каскад проверяется с конца, новый победитель
+        запоминается, а смена победителя попадает в лог.
+        """
+        parser = parser or get_parser()
         result = {'title': None, 'content': None, 'article': None}
         
         for field, field_selectors in selectors.items():
             if isinstance(field_selectors, str):
                 field_selectors = [field_selectors]
             
-            for selector in field_selectors:
+            learned = self.selector_memory.get(source_key, field)
+            candidates = list(reversed(field_selectors))
+            if learned in field_selectors:
+                candidates.remove(learned)
+                candidates.insert(0, learned)
+
+            for selector in candidates:
                 try:
-                    elements = soup.select(selector)
-                    for element in elements:
-                        text = element.get_text(strip=True)
+                    for element in parser.select(document, selector):
+                        text = parser.text(element)
                         if text and len(text) > 50:
                             result[field] = text
                             logger.info(f"Найден контент для поля {field} длиной {len(text)} символов")
                             break
                 except Exception as e:
                     logger.warning(f"Ошибка при поиске {field} с селектором {selector}: {str(e)}")
+                
+                if result.get(field) is not None:
+                    self.selector_memory.record(source_key, field, selector)
+                    break
         
         # Логируем результаты поиска
         for field, value in result.items():
@@ -120,156 +222,355 @@ class Scraper:
         
         return result
 
-    async def scrape_with_retry(self, source: MedicalSource, max_retries: int = 3) -> Optional[Dict]:
-        """Скрапит медицинский контент с механизмом повторных попыток"""
+    async def scrape_with_retry(self, source: MedicalSource, max_retries: int = 3,
+                                full_page: bool = False) -> Optional[Dict]:
+        """
+        Скрапит медицинский контент с механизмом повторных попыток
+        
+        :param full_page: Читать страницу целиком и сохранить её для обхода (take_start_page)
+        """
         logger.info(f"Начало скрапинга источника {source.name} ({source.url})")
         
+        # Хост с открытым автоматом пропускаем сразу, до истечения паузы
+        if self.breaker.is_open(source.url):
+            logger.info(f"Источник {source.name} временно пропущен: хост недоступен")
+            return None
+        
         # Проверяем доступность хоста перед скрапингом
         if not await self.check_host_availability(source.url):
             logger.error(f"Хост недоступен для {source.url}")
+            self.breaker.record_failure(source.url)
             return None
 
         for attempt in range(max_retries):
             try:
-                result = await self.scrape_medical_source(source)
+                result = await self.scrape_medical_source(source, full_page=full_page)
                 
                 if result:
                     logger.info(f"Успешный скрапинг для {source.name}: {result.get('title', 'Без заголовка')}")
                     return result
                 else:
                     logger.warning(f"Скрапинг не удался для {source.name} (попытка {attempt + 1})")
-                
-                if attempt < max_retries - 1:
-                    delay = min(2 ** attempt, 10)
-                    logger.warning(f"Попытка {attempt + 1} не удалась для {source.url}. Ожидание {delay} секунд.")
-                    await asyncio.sleep(delay)
             except Exception as e:
                 logger.error(f"Попытка {attempt + 1} не удалась для {source.url}: {str(e)}", exc_info=True)
-                if attempt < max_retries - 1:
-                    delay = min(2 ** attempt, 10)
-                    await asyncio.sleep(delay)
+            
+            if self.breaker.is_open(source.url):
+                logger.warning(f"Хост {source.url} отключен, повторные попытки прекращены")
+                break
+            if attempt < max_retries - 1:
+                delay = self.breaker.backoff(source.url, attempt)
+                logger.warning(f"Попытка {attempt + 1} не удалась для {source.url}. Ожидание {delay:.1f} секунд.")
+                await asyncio.sleep(delay)
         
         logger.error(f"Все попытки скрапинга для {source.url} завершились неудачно")
         return None
 
-    async def scrape_medical_source(self, source: MedicalSource) -> Optional[Dict]:
+    async def scrape_medical_source(self, source: MedicalSource, full_page: bool = False) -> Optional[Dict]:
         """Безопаснее и информативнее скрапит источник"""
+        responded = True
+        requested = False
         try:
             if not await self.check_host_availability(source.url):
                 return None
 
             ssl_context = source.ssl_context or (False if not source.verify_ssl else None)
-            connector = aiohttp.TCPConnector(
-                ssl=ssl_context, 
-                force_close=True, 
-                enable_cleanup_closed=True, 
-                limit_per_host=1
-            )
-
-            async with aiohttp.ClientSession(
-                headers={**self.headers, **(source.headers or {})},
-                timeout=self.timeout,
-                connector=connector
-            ) as session:
-                async with session.get(source.url, allow_redirects=True) as response:
-                    if response.status not in {200, 302}:
-                        logger.error(f"Статус {response.status} для {source.url}")
-                        return None
+            request_options = {'ssl': ssl_context} if ssl_context is not None else {}
+
+            # Свежая запись HTTP-кэша - без обращения к сети
+            cached = await self.http_cache.aget(source.url)
+            if cached is not None and full_page and not cached.body:
+                cached = None  # нужна вся страница, а сохранен только результат разбора
+            if cached is not None and cached.is_fresh and self._cache_usable(source, cached):
+                logger.info(f"Страница {source.url} взята из HTTP-кэша")
+                if full_page:
+                    self.start_pages[source.url] = cached.body
+                return await self._cached_result(source, cached)
 
+            if not self.breaker.allow(source.url):
+                logger.info(f"Запрос к {source.url} пропущен: хост временно отключен")
+                return None
+
+            requested = True
+            responded = False
+            started = time.monotonic()
+            session = await self._get_session()
+            async with session.get(
+                source.url,
+                headers={**self.headers, **(source.headers or {}), **self.http_cache.conditional_headers(cached)},
+                allow_redirects=True,
+                **request_options
+            ) as response:
+                responded = True
+                self._record_status(source.url, response.status, time.monotonic() - started)
+                if response.status == 304 and cached is not None and self._cache_usable(source, cached):
+                    logger.info(f"Страница {source.url} не изменилась (304)")
+                    await self.http_cache.amark_not_modified(cached, response.headers)
+                    if full_page:
+                        self.start_pages[source.url] = cached.body
+                    return await self._cached_result(source, cached)
+
+                if response.status not in {200, 302}:
+                    logger.error(f"Статус {response.status} для {source.url}")
+                    return None
+
+                complete = True
+                if self.streaming:
+                    html, result, complete = await self._read_streaming(source, response, early_stop=not full_page)
+                else:
                     html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    content_data = await self.find_content(soup, source.selectors)
+                    result = await self.parse_page(source, html)
+                await self.http_cache.astore(source.url, response.headers, html, result, self._parser_key(source),
+                                             complete=complete)
+                if full_page:
+                    self.start_pages[source.url] = html
+                return result
                     
-                    if not all([content_data['title'], content_data['content']]):
-                        logger.warning(f"Неполные данные для {source.url}")
-                        return None
-                    
-                    return {
-                        'title': content_data['title'],
-                        'content': content_data['content'],
-                        'keywords': self._extract_keywords(content_data['content']),
-                        'source_name': source.name,
-                        'source_url': source.url,
-                        'category': source.category,
-                        'language': source.language,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                        
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Сетевая ошибка при скрапинге {source.url}: {e!r}")
+            self.breaker.record_failure(source.url)
+            return None
         except Exception as e:
             logger.exception(f"Неожиданная ошибка при скрапинге {source.url}: {e}")
+            if not responded:
+                self.breaker.record_failure(source.url)
+            return None
+        finally:
+            # Отмена до ответа: пробный запрос не должен остаться занятым
+            if requested and not responded:
+                self.breaker.release(source.url)
+
+    def _record_status(self, url: str, status: int, latency: float):
+        # 429 и 5xx - признак перегрузки или сбоя хоста, остальные ответы - хост жив
+        if status == 429 or status >= 500:
+            self.breaker.record_failure(url, latency)
+        else:
+            self.breaker.record_success(url, latency)
+
+
+    @staticmethod
+    def _charset(response: aiohttp.ClientResponse, head: bytes) -> str:
+        """Кодировка из Content-Type, затем из <meta charset> в начале страницы"""
+        candidates = [response.charset]
+        match = META_CHARSET_RE.search(head)
+        if match:
+            candidates.append(match.group(1).decode('ascii'))
+        for charset in candidates:
+            if charset:
+                try:
+                    return codecs.lookup(charset).name
+                except LookupError:
+                    continue
+        return 'utf-8'
+
+    async def _read_streaming(self, source: MedicalSource, response: aiohttp.ClientResponse,
+                              early_stop: bool = True) -> Tuple[str, Optional[Dict], bool]:
+        """
+        Потоковое чтение страницы не больше max_bytes
+        
+        Тело декодируется по частям; на контрольных точках (64 КБ, 128 КБ, ...)
+        прочитанная часть разбирается, и если заголовок и текст статьи
+        совпали на двух точках подряд, загрузка прекращается (если early_stop).
+        
+        :return: Прочитанный HTML, результат разбора и признак, что страница прочитана целиком
+        """
+        decoder = None
+        parts = []
+        size = 0
+        checkpoint = STREAM_FIRST_CHECKPOINT
+        previous = None
+        
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(self._charset(response, chunk))(errors='replace')
+            chunk = chunk[:self.max_bytes - size]
+            parts.append(decoder.decode(chunk))
+            size += len(chunk)
+            
+            if size >= self.max_bytes:
+                logger.warning(f"Страница {source.url} обрезана до {self.max_bytes} байт")
+                html = ''.join(parts)
+                return html, await self.parse_page(source, html), False
+            
+            if early_stop and size >= checkpoint:
+                checkpoint *= 2
+                result = await self.parse_page(source, ''.join(parts))
+                if (result is not None and previous is not None
+                        and (result['title'], result['content']) == (previous['title'], previous['content'])):
+                    logger.info(f"Загрузка {source.url} остановлена после {size} байт: статья найдена")
+                    return ''.join(parts), result, False
+                previous = result
+        
+        if decoder is not None:
+            parts.append(decoder.decode(b'', final=True))
+        html = ''.join(parts)
+        return html, await self.parse_page(source, html), True
+
+    async def fetch_page(self, source: MedicalSource, url: str) -> Optional[str]:
+        """
+        Загрузка произвольной страницы источника (не больше max_bytes) без разбора и HTTP-кэша
+        """
+        ssl_context = source.ssl_context or (False if not source.verify_ssl else None)
+        request_options = {'ssl': ssl_context} if ssl_context is not None else {}
+        if not self.breaker.allow(url):
+            return None
+        
+        responded = False
+        started = time.monotonic()
+        try:
+            session = await self._get_session()
+            async with session.get(
+                url,
+                headers={**self.headers, **(source.headers or {})},
+                allow_redirects=True,
+                **request_options
+            ) as response:
+                responded = True
+                self._record_status(url, response.status, time.monotonic() - started)
+                if response.status != 200:
+                    logger.warning(f"Статус {response.status} для {url}")
+                    return None
+                
+                decoder = None
+                parts = []
+                size = 0
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder(self._charset(response, chunk))(errors='replace')
+                    chunk = chunk[:self.max_bytes - size]
+                    parts.append(decoder.decode(chunk))
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        logger.warning(f"Страница {url} обрезана до {self.max_bytes} байт")
+                        break
+                if decoder is not None:
+                    parts.append(decoder.decode(b'', final=True))
+                return ''.join(parts)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке {url}: {str(e)}")
+            if not responded or isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                self.breaker.record_failure(url)
+            return None
+        finally:
+            if not responded:
+                self.breaker.release(url)
+
+    def parser_for(self, source: MedicalSource) -> HTMLParserBackend:
+        return get_parser(source.parser) if source.parser else self.parser
+
+    def _parser_key(self, source: MedicalSource) -> str:
+        """Отпечаток настроек разбора: при их смене сохраненный результат разбирается заново"""
+        settings = {'selectors': source.selectors, 'parser': self.parser_for(source).name}
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _cache_usable(self, source: MedicalSource, cached) -> bool:
+        """Запись без тела (страница была прочитана не целиком) годится, только если разбор не устарел"""
+        return bool(cached.body) or cached.parser_key == self._parser_key(source)
+
+    async def _cached_result(self, source: MedicalSource, cached) -> Optional[Dict]:
+        parser_key = self._parser_key(source)
+        if cached.parser_key == parser_key:
+            return cached.parsed
+        result = await self.parse_page(source, cached.body)
+        await self.http_cache.aupdate_parsed(source.url, result, parser_key)
+        return result
+
+    async def parse_page(self, source: MedicalSource, html: str, page_url: Optional[str] = None,
+                         source_key: Optional[str] = None) -> Optional[Dict]:
+        """
+        Извлечение статьи из HTML страницы источника
+        
+        :param page_url: Адрес страницы, если это не стартовая страница источника
+        :param source_key: Ключ запоминания селекторов (по умолчанию адрес источника)
+        """
+        parser = self.parser_for(source)
+        document = parser.parse(html)
+        
+        content_data = await self.find_content(document, source.selectors, parser, source_key=source_key or source.url)
+        
+        if not all([content_data['title'], content_data['content']]):
+            logger.warning(f"Неполные данные для {page_url or source.url}")
             return None
+        
+        return {
+            'title': content_data['title'],
+            'content': content_data['content'],
+            'keywords': self._extract_keywords(content_data['content']),
+            'source_name': source.name,
+            'source_url': page_url or source.url,
+            'category': source.category,
+            'language': source.language,
+            'timestamp': datetime.now().isoformat()
+        }
 
 
     # Добавляем метод scrape_page_articles
-    async def scrape_page_articles(self, url: str, max_articles: int = 10) -> List[Dict]:
+    async def scrape_page_articles(self, url: str, max_articles: int = 10,
+                                   parser: Optional[HTMLParserBackend] = None) -> List[Dict]:
         """Скрапит Multiple статей с указанной страницы"""
+        parser = parser or self.parser
         try:
-            connector = aiohttp.TCPConnector(ssl=False)
-            async with aiohttp.ClientSession(headers=self.headers, connector=connector) as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        logger.error(f"Не удалось получить страницу {url}. Статус: {response.status}")
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    articles = []
-                    
-                    # Расширенный список селекторов для поиска статей
-                    article_selectors = [
-                        '.post', 'article', '.news-item', '.article-item', 
-                        '.blog-post', '.content-block', '.entry', 
-                        '.article', '.post-item', '.card'
-                    ]
-                    
-                    for selector in article_selectors:
-                        items = soup.select(selector)
-                        if items:
-                            for item in items[:max_articles]:
-                                try:
-                                    # Более гибкий поиск заголовка и контента
-                                    title = (
-                                        item.select_one('h1, h2, h3, .title, .headline, a.title') or
-                                        item.select_one('.post-title, .entry-title')
-                                    )
+            session = await self._get_session()
+            async with session.get(url, ssl=False) as response:
+                if response.status != 200:
+                    logger.error(f"Не удалось получить страницу {url}. Статус: {response.status}")
+                    return []
+                
+                html = await response.text()
+                document = parser.parse(html)
+                articles = []
+                
+                # Расширенный список селекторов для поиска статей
+                article_selectors = [
+                    '.post', 'article', '.news-item', '.article-item', 
+                    '.blog-post', '.content-block', '.entry', 
+                    '.article', '.post-item', '.card'
+                ]
+                
+                for selector in article_selectors:
+                    items = parser.select(document, selector)
+                    if items:
+                        for item in items[:max_articles]:
+                            try:
+                                # Более гибкий поиск заголовка и контента
+                                title = parser.select_first(
+                                    item, 'h1, h2, h3, .title, .headline, a.title', '.post-title, .entry-title'
+                                )
+                                
+                                content = parser.select_first(
+                                    item, 'p, .content, .text, .excerpt, .summary', '.post-content, .entry-content'
+                                )
+                                
+                                # Поиск ссылки на полную статью
+                                link = parser.select_first(item, 'a.read-more, a.more-link, a.post-link')
+                                if link is None and title is not None:
+                                    link = parser.select_one(title, 'a')
+                                
+                                if title is not None and content is not None:
+                                    href = parser.attr(link, 'href') if link is not None else None
+                                    article_data = {
+                                        'title': parser.text(title),
+                                        'content': parser.text(content)[:500],  # Ограничиваем длину контента
+                                        'url': href if href is not None else url
+                                    }
                                     
-                                    content = (
-                                        item.select_one('p, .content, .text, .excerpt, .summary') or
-                                        item.select_one('.post-content, .entry-content')
-                                    )
+                                    # Добавляем дополнительные метаданные, если возможно
+                                    date = parser.select_one(item, 'time, .date, .post-date')
+                                    if date is not None:
+                                        article_data['date'] = parser.text(date)
                                     
-                                    # Поиск ссылки на полную статью
-                                    link = (
-                                        item.select_one('a.read-more, a.more-link, a.post-link') or
-                                        (title.find('a') if title and title.find('a') else None)
-                                    )
+                                    articles.append(article_data)
                                     
-                                    if title and content:
-                                        article_data = {
-                                            'title': title.get_text(strip=True),
-                                            'content': content.get_text(strip=True)[:500],  # Ограничиваем длину контента
-                                            'url': link['href'] if link and link.has_attr('href') else url
-                                        }
-                                        
-                                        # Добавляем дополнительные метаданные, если возможно
-                                        date = item.select_one('time, .date, .post-date')
-                                        if date:
-                                            article_data['date'] = date.get_text(strip=True)
-                                        
-                                        articles.append(article_data)
-                                        
-                                        if len(articles) >= max_articles:
-                                            break
-                                except Exception as e:
-                                    logger.error(f"Ошибка при парсинге статьи: {str(e)}")
-                                    continue
-                            
-                            break  # Если нашли статьи по одному из селекторов, прекращаем поиск
-                    
-                    logger.info(f"Найдено {len(articles)} статей на странице {url}")
-                    return articles
-                    
+                                    if len(articles) >= max_articles:
+                                        break
+                            except Exception as e:
+                                logger.error(f"Ошибка при парсинге статьи: {str(e)}")
+                                continue
+                        
+                        break  # Если нашли статьи по одному из селекторов, прекращаем поиск
+                
+                logger.info(f"Найдено {len(articles)} статей на странице {url}")
+                return articles
+                
         except Exception as e:
             logger.error(f"Ошибка при скрапинге страницы {url}: {str(e)}")
             return []
\ No newline at end of file
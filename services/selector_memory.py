@@ -0,0 +1,60 @@
+import json
+import os
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorMemory:
+    """
+    Запомненные селекторы, которые извлекли поле у источника.
+
+    Scraper.find_content пробует запомненный селектор первым и проходит
+    каскад, только если он не сработал. Хранится в JSON-файле вида
+    {источник: {поле: селектор}} и переживает перезапуск бота. Файл перезаписывается только при
+    смене выигравшего селектора - обычно это значит, что у источника
+    изменилась верстка.
+    """
+
+    def __init__(self, path: str = 'learned_selectors.json'):
+        self.path = path
+        self._selectors: Dict[str, Dict[str, str]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать {self.path}: {e}")
+            return
+        if isinstance(data, dict):
+            self._selectors = {source: dict(fields) for source, fields in data.items() if isinstance(fields, dict)}
+
+    def _save(self):
+        # Запись через временный файл, чтобы не оставить обрезанный JSON
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._selectors, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить {self.path}: {e}")
+
+    def get(self, source_key: Optional[str], field: str) -> Optional[str]:
+        return self._selectors.get(source_key, {}).get(field) if source_key else None
+
+    def record(self, source_key: Optional[str], field: str, selector: str):
+        """Запоминает селектор, извлекший поле"""
+        previous = self.get(source_key, field)
+        if not source_key or previous == selector:
+            return
+        self._selectors.setdefault(source_key, {})[field] = selector
+        if previous is None:
+            logger.info(f"Для {source_key} поле {field} извлекается селектором '{selector}'")
+        else:
+            logger.warning(f"Для {source_key} поле {field} теперь извлекается '{selector}' вместо '{previous}'")
+        self._save()
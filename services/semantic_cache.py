@@ -0,0 +1,166 @@
+import math
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+from database.db_manager import DBManager
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Локальный кэш ответов для перефразированных вопросов.
+
+    Вопросы представлены векторами TF-IDF по символьным n-граммам,
+    схожесть - косинусная. Кандидаты берутся из инвертированного индекса
+    n-грамм, поэтому поиск не перебирает весь кэш. Размер ограничен,
+    вытесняются давно не использованные записи (LRU).
+
+    Нормы векторов записей хранятся и пересчитываются целиком, только
+    когда с прошлого пересчета добавлено и вытеснено больше
+    NORM_REFRESH_RATIO записей от размера кэша (IDF меняются с каждой
+    такой операцией, в том числе у заполненного кэша). Устаревшие нормы
+    используются только для выбора лучшего кандидата: его схожесть перед
+    сравнением с порогом считается по точной норме.
+    """
+
+    NORM_REFRESH_RATIO = 0.25
+
+    def __init__(self, threshold: float = 0.8, max_size: int = 5000, ngram_size: int = 3):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ngram_size = ngram_size
+
+        # нормализованный вопрос -> (n-граммы, ответ), порядок - LRU
+        self._entries: "OrderedDict[str, Tuple[Counter, str]]" = OrderedDict()
+        # n-грамма -> вопросы, в которых она встречается
+        self._postings: Dict[str, set] = defaultdict(set)
+        # нормализованный вопрос -> норма вектора TF-IDF
+        self._norms: Dict[str, float] = {}
+        # Добавлений и вытеснений с последнего пересчета норм
+        self._changes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _ngrams(self, normalized: str) -> Counter:
+        padded = f" {normalized} "
+        size = self.ngram_size
+        return Counter(padded[i:i + size] for i in range(max(len(padded) - size + 1, 0)))
+
+    def _idf(self, ngram: str) -> float:
+        # Сглаженный IDF: не обнуляется для n-грамм, встречающихся везде
+        return math.log((1 + len(self._entries)) / (1 + len(self._postings.get(ngram, ())))) + 1
+
+    def _norm(self, ngrams: Counter) -> float:
+        return math.sqrt(sum((count * self._idf(ngram)) ** 2 for ngram, count in ngrams.items()))
+
+    def add(self, question: str, answer: str):
+        """Добавление (или обновление) ответа в кэше"""
+        normalized = DBManager.normalize_text(question)
+        if not normalized or not answer:
+            return
+
+        if normalized in self._entries:
+            self._entries[normalized] = (self._entries[normalized][0], answer)
+            self._entries.move_to_end(normalized)
+            return
+
+        ngrams = self._ngrams(normalized)
+        self._entries[normalized] = (ngrams, answer)
+        for ngram in ngrams:
+            self._postings[ngram].add(normalized)
+        self._norms[normalized] = self._norm(ngrams)
+        self._changes += 1
+
+        while len(self._entries) > self.max_size:
+            self._evict()
+
+    def _evict(self):
+        normalized, (ngrams, _) = self._entries.popitem(last=False)
+        self._norms.pop(normalized, None)
+        self._changes += 1
+        for ngram in ngrams:
+            questions = self._postings.get(ngram)
+            if questions is not None:
+                questions.discard(normalized)
+                if not questions:
+                    del self._postings[ngram]
+
+    def _refresh_norms(self):
+        """Пересчет норм, если IDF заметно изменились с прошлого раза"""
+        if self._changes <= self.NORM_REFRESH_RATIO * len(self._entries):
+            return
+        self._norms = {question: self._norm(ngrams) for question, (ngrams, _) in self._entries.items()}
+        self._changes = 0
+
+    def warm(self, pairs: Iterable[Tuple[str, str]]):
+        """Заполнение кэша сохраненными парами вопрос-ответ"""
+        for question, answer in pairs:
+            self.add(question, answer)
+        logger.info(f"Семантический кэш прогрет: {len(self._entries)} вопросов")
+
+    def lookup(self, question: str) -> Optional[str]:
+        """
+        Поиск ответа на близкий по смыслу вопрос.
+
+        :return: Ответ, если косинусная схожесть не ниже порога, иначе None
+        """
+        normalized = DBManager.normalize_text(question)
+        best_question, best_score = self._best_match(normalized) if normalized else (None, 0.0)
+
+        if best_question is not None and best_score >= self.threshold:
+            self.hits += 1
+            self._entries.move_to_end(best_question)
+            logger.info(f"Семантический кэш: попадание ({best_score:.2f}) для '{question}' -> '{best_question}'")
+            return self._entries[best_question][1]
+
+        self.misses += 1
+        logger.debug(f"Семантический кэш: промах ({best_score:.2f}) для '{question}'")
+        return None
+
+    def _best_match(self, normalized: str) -> Tuple[Optional[str], float]:
+        if normalized in self._entries:
+            return normalized, 1.0
+
+        self._refresh_norms()
+        query = self._ngrams(normalized)
+        query_weights = {ngram: count * self._idf(ngram) for ngram, count in query.items()}
+        query_norm = math.sqrt(sum(weight ** 2 for weight in query_weights.values()))
+        if not query_norm:
+            return None, 0.0
+
+        dots: Dict[str, float] = defaultdict(float)
+        for ngram, weight in query_weights.items():
+            idf = self._idf(ngram)
+            for candidate in self._postings.get(ngram, ()):
+                dots[candidate] += weight * self._entries[candidate][0][ngram] * idf
+
+        best_question, best_score = None, 0.0
+        for candidate, dot in dots.items():
+            norm = self._norms.get(candidate)
+            if not norm:
+                continue
+            score = dot / (query_norm * norm)
+            if score > best_score:
+                best_question, best_score = candidate, score
+        if best_question is None:
+            return None, 0.0
+
+        # Сохраненная норма могла устареть: точная схожесть для победителя
+        exact_norm = self._norm(self._entries[best_question][0])
+        return best_question, dots[best_question] / (query_norm * exact_norm)
+
+    def stats(self) -> Dict[str, float]:
+        """Счетчики попаданий и промахов"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,98 @@
+import hmac
+import json
+from typing import Optional
+import logging
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from config.config import (
+    WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_URL
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+# Telegram присылает обновления заметно меньше этого размера
+MAX_UPDATE_SIZE = 1024 * 1024
+
+
+class WebhookServer:
+    """
+    Прием обновлений Telegram через webhook вместо long polling.
+
+    Встроенный HTTP-сервер (aiohttp) принимает POST на path и кладет
+    обновление в очередь Application, обработка идет как при polling.
+    Запросы без заголовка X-Telegram-Bot-Api-Secret-Token с secret_token
+    отклоняются (403).
+
+    Если задан url (публичный адрес, под которым Telegram видит сервер),
+    при запуске webhook регистрируется в Telegram. Без url регистрацию
+    выполняют отдельно - например, когда несколько процессов стоят за
+    балансировщиком. При остановке webhook не удаляется, чтобы не
+    отключать остальные процессы.
+    """
+
+    def __init__(self, application: Application, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT,
+                 path: str = WEBHOOK_PATH, secret_token: str = WEBHOOK_SECRET_TOKEN,
+                 url: Optional[str] = WEBHOOK_URL):
+        if not secret_token:
+            raise ValueError("Для режима webhook нужен WEBHOOK_SECRET_TOKEN")
+        self.application = application
+        self.host = host
+        self.port = port
+        self.path = '/' + path.lstrip('/')
+        self.secret_token = secret_token
+        self.url = url.rstrip('/') + self.path if url else None
+        self._runner: Optional[web.AppRunner] = None
+
+        self.received = 0
+        self.rejected = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=MAX_UPDATE_SIZE)
+        app.router.add_post(self.path, self.handle_update)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token.encode(), self.secret_token.encode()):
+            self.rejected += 1
+            logger.warning(f"Webhook: отклонен запрос без верного секрета от {request.remote}")
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            if not isinstance(data, dict):
+                raise ValueError("ожидался JSON-объект")
+            update = Update.de_json(data, self.application.bot)
+        except (json.JSONDecodeError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Webhook: некорректное обновление: {str(e)}")
+            return web.Response(status=400)
+
+        self.received += 1
+        # Отвечаем сразу: Telegram не ждет окончания обработки
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Webhook-сервер слушает {self.host}:{self.port}{self.path}")
+
+        if self.url:
+            await self.application.bot.set_webhook(
+                url=self.url,
+                secret_token=self.secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=True
+            )
+            logger.info(f"Webhook зарегистрирован: {self.url}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        logger.info("Webhook-сервер остановлен")
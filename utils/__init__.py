@@ -1,3 +1,6 @@
 from .text_processor import clean_text, extract_keywords, format_message
+from .single_flight import SingleFlight
+from .stream_renderer import StreamRenderer
+from .rate_limiter import RateLimiter
 
-__all__ = ['clean_text', 'extract_keywords', 'format_message']
+__all__ = ['clean_text', 'extract_keywords', 'format_message', 'SingleFlight', 'StreamRenderer', 'RateLimiter']
@@ -0,0 +1,188 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_KEY = 'global'
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Не больше max_requests запросов за time_window секунд"""
+    max_requests: int
+    time_window: float
+
+    @property
+    def interval(self) -> float:
+        return self.time_window / self.max_requests
+
+
+class MemoryBucketStore:
+    """Состояние лимитов в памяти процесса"""
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    @contextmanager
+    def transaction(self):
+        yield
+
+    def get(self, keys: Iterable[str]) -> Dict[str, float]:
+        return {key: self._tats[key] for key in keys if key in self._tats}
+
+    def set(self, tats: Dict[str, float]):
+        self._tats.update(tats)
+
+    def evict(self, now: float) -> int:
+        idle = [key for key, tat in self._tats.items() if tat <= now]
+        for key in idle:
+            del self._tats[key]
+        return len(idle)
+
+
+class SqliteBucketStore:
+    """
+    Состояние лимитов в общем sqlite-файле.
+
+    Чтение и запись идут в одной транзакции BEGIN IMMEDIATE, поэтому
+    несколько процессов бота с одним файлом соблюдают общий лимит.
+    Блокировку файла ждем не дольше busy_timeout секунд, после чего
+    sqlite3.OperationalError уходит вызывающему.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 0.2):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_tat ON rate_limits (tat)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def get(self, keys: Iterable[str]) -> Dict[str, float]:
+        keys = list(keys)
+        rows = self._connection.execute(
+            f"SELECT key, tat FROM rate_limits WHERE key IN ({','.join('?' * len(keys))})", keys
+        )
+        return dict(rows.fetchall())
+
+    def set(self, tats: Dict[str, float]):
+        self._connection.executemany(
+            "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+            tats.items()
+        )
+
+    def evict(self, now: float) -> int:
+        return self._connection.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,)).rowcount
+
+
+class RateLimiter:
+    """
+    Ограничение частоты запросов по алгоритму GCRA (вариант token bucket).
+
+    Для каждого ключа хранится одно число - теоретическое время прибытия
+    (TAT) следующего запроса, поэтому проверка выполняется за O(1).
+    Лимит max_requests за time_window допускает всплеск до max_requests
+    запросов, дальше - по одному каждые time_window / max_requests секунд.
+    Это не скользящее окно: сразу после всплеска корзина начинает
+    пополняться, так что за первые time_window секунд проходит до
+    2 * max_requests - 1 запросов (при 10 за 60 с - 19), а в среднем
+    на длинном отрезке - max_requests за time_window.
+
+    Кроме лимита на пользователя может действовать общий лимит на всех
+    (global_max_requests). Запрос засчитывается, только если разрешен
+    обоими. Ключи, у которых TAT в прошлом (корзина полна), ничем не
+    отличаются от новых и раз в evict_interval секунд удаляются.
+
+    С shared_path состояние хранится в sqlite-файле, общем для
+    нескольких процессов бота. Если файл занят дольше busy_timeout или
+    недоступен, запрос пропускается (fail open): ограничитель не должен
+    останавливать бота. В асинхронном коде используйте ais_allowed - он
+    обращается к файлу в отдельном потоке и не блокирует цикл событий.
+    """
+
+    def __init__(self, max_requests: int = 10, time_window: float = 60,
+                 global_max_requests: int = 0, global_time_window: float = 60,
+                 shared_path: Optional[str] = None, evict_interval: float = 300,
+                 busy_timeout: float = 0.2):
+        if max_requests <= 0 or time_window <= 0:
+            raise ValueError(
+                f"Лимит запросов должен быть положительным: {max_requests} за {time_window} с"
+            )
+        if global_max_requests > 0 and global_time_window <= 0:
+            raise ValueError(f"Окно общего лимита должно быть положительным: {global_time_window} с")
+        self.limit = Limit(max_requests, time_window)
+        self.global_limit = Limit(global_max_requests, global_time_window) if global_max_requests > 0 else None
+        self.store = SqliteBucketStore(shared_path, busy_timeout) if shared_path else MemoryBucketStore()
+        self.evict_interval = evict_interval
+        self._next_eviction = time.time() + evict_interval
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @staticmethod
+    def _user_key(user_id: Hashable) -> str:
+        return f"user:{user_id}"
+
+    async def ais_allowed(self, user_id: Hashable) -> bool:
+        if isinstance(self.store, SqliteBucketStore):
+            return await asyncio.to_thread(self.is_allowed, user_id)
+        return self.is_allowed(user_id)
+
+    def is_allowed(self, user_id: Hashable) -> bool:
+        try:
+            return self._check(user_id)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Общее состояние ограничителя запросов недоступно, запрос пропущен: {str(e)}")
+            return True
+
+    def _check(self, user_id: Hashable) -> bool:
+        now = time.time()
+        limits = {self._user_key(user_id): self.limit}
+        if self.global_limit:
+            limits[GLOBAL_KEY] = self.global_limit
+
+        with self.store.transaction():
+            stored = self.store.get(limits)
+            new_tats = {}
+            for key, limit in limits.items():
+                tat = max(stored.get(key, now), now) + limit.interval
+                # Допуск на погрешность сложения интервалов
+                if tat - now > limit.time_window + 1e-9:
+                    return False
+                new_tats[key] = tat
+            self.store.set(new_tats)
+
+            if now >= self._next_eviction:
+                self._next_eviction = now + self.evict_interval
+                evicted = self.store.evict(now)
+                if evicted:
+                    logger.debug(f"Удалено неактивных ключей ограничителя запросов: {evicted}")
+        return True
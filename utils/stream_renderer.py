@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+import logging
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Лимит длины сообщения Telegram
+MAX_MESSAGE_LENGTH = 4096
+
+
+class StreamRenderer:
+    """
+    Постепенный вывод генерируемого текста в одно сообщение Telegram.
+
+    Сообщение-заглушка редактируется по мере поступления текста, но не
+    чаще раза в interval секунд (Telegram ограничивает частоту правок
+    и отвечает RetryAfter при превышении). Первый фрагмент выводится
+    сразу. Промежуточный текст помечается курсором, итоговый выводится
+    через finish().
+    """
+
+    # Попыток итоговой правки, каждая после запрошенной Telegram паузы
+    FINISH_ATTEMPTS = 5
+
+    def __init__(self, message: Message, interval: float = 1.5, cursor: str = ' ▌'):
+        self.message = message
+        self.interval = interval
+        self.cursor = cursor
+        self.rendered: Optional[str] = message.text
+        self.edits = 0
+        self._next_edit = 0.0
+        self._retry_until = 0.0
+
+    async def _edit(self, text: str, **kwargs) -> bool:
+        try:
+            await self.message.edit_text(text, **kwargs)
+        except RetryAfter as e:
+            self._postpone(e)
+            return False
+        except BadRequest as e:
+            # Текст не изменился - правка не нужна
+            if 'not modified' not in str(e).lower():
+                raise
+        self.rendered = text
+        self.edits += 1
+        return True
+
+    def _postpone(self, error: RetryAfter):
+        retry_after = error.retry_after
+        retry_after = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+        self._retry_until = time.monotonic() + retry_after
+        logger.warning(f"Telegram ограничил частоту правок, пауза {retry_after:.0f} с")
+
+    async def _wait_retry(self):
+        delay = self._retry_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def update(self, text: str):
+        """Промежуточный текст; правка пропускается, если с прошлой прошло меньше interval"""
+        now = time.monotonic()
+        if not text.strip() or now < max(self._next_edit, self._retry_until):
+            return
+        preview = text[:MAX_MESSAGE_LENGTH - len(self.cursor)] + self.cursor
+        if preview == self.rendered:
+            return
+        self._next_edit = now + self.interval
+        await self._edit(preview)
+
+    async def render(self, chunks: AsyncIterator[str]) -> str:
+        """
+        Вывод потока фрагментов
+
+        :return: Полный текст без курсора
+        """
+        text = ''
+        async for chunk in chunks:
+            text += chunk
+            await self.update(text)
+        return text
+
+    async def finish(self, text: str, **kwargs):
+        """
+        Итоговый текст; ждет только паузы, которые запросил Telegram
+
+        Если правка так и не удалась, итог отправляется новым сообщением,
+        а заглушка с недописанным текстом удаляется.
+        """
+        if text == self.rendered and not kwargs:
+            return
+        for _ in range(self.FINISH_ATTEMPTS):
+            await self._wait_retry()
+            try:
+                if await self._edit(text, **kwargs):
+                    return
+            except TelegramError as e:
+                logger.warning(f"Не удалось обновить сообщение, ответ будет отправлен заново: {str(e)}")
+                break
+
+        for attempt in range(self.FINISH_ATTEMPTS):
+            await self._wait_retry()
+            try:
+                await self.message.reply_text(text, **kwargs)
+                break
+            except RetryAfter as e:
+                if attempt == self.FINISH_ATTEMPTS - 1:
+                    raise
+                self._postpone(e)
+        try:
+            await self.message.delete()
+        except TelegramError as e:
+            logger.warning(f"Не удалось удалить промежуточное сообщение: {str(e)}")